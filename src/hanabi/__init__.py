@@ -1 +1,28 @@
-from .deck import Deck, Game
+"""
+Hanabi game engine and AIs.
+
+Submodules (and hanabi.Deck, hanabi.Game) are imported on first use,
+so that `import hanabi` is fast: hanabi.ai, for instance, is only
+imported when an AI is looked up.
+"""
+
+from importlib import import_module
+
+SUBMODULES = ('action', 'ai', 'ascii_art', 'batch', 'belief', 'deck', 'evaluate', 'events',
+              'mcts', 'profiling', 'replay', 'server', 'solver', 'stats', 'tournament', 'view',
+              'zobrist')
+# name: submodule where it is defined
+_NAMES = {'Deck': 'deck', 'Game': 'deck'}
+
+
+def __getattr__(name):
+    if name in SUBMODULES:
+        return import_module('.' + name, __name__)
+    if name in _NAMES:
+        value = globals()[name] = getattr(import_module('.' + _NAMES[name], __name__), name)
+        return value
+    raise AttributeError("module %r has no attribute %r"%(__name__, name))
+
+
+def __dir__():
+    return sorted(list(globals()) + list(SUBMODULES) + list(_NAMES))
@@ -0,0 +1,110 @@
+"""
+Structured player actions.
+
+Instead of the 2 or 3 letters codes typed at the ``hanabi>`` prompt
+(``p3``, ``d1``, ``cRB``), an AI may return one of these objects:
+the game applies them directly, without parsing any string.
+
+Card indices are 1-based, as on the prompt.
+A clue target is relative to the current player (1 is the next player).
+
+Actions also have a one byte code (see encode and decode), used by replays.
+
+.. autosummary::
+   Play
+   Discard
+   Clue
+   encode
+   decode
+   parse
+"""
+
+from collections import namedtuple
+
+
+class Action:
+    "Base class of structured actions."
+    __slots__ = ()
+
+
+class Play(namedtuple('Play', 'index'), Action):
+    "Play the card at the given (1-based) index."
+    __slots__ = ()
+
+    def __str__(self):
+        return 'p%d'%self.index
+
+
+class Discard(namedtuple('Discard', 'index'), Action):
+    "Discard the card at the given (1-based) index."
+    __slots__ = ()
+
+    def __str__(self):
+        return 'd%d'%self.index
+
+
+class Clue(namedtuple('Clue', 'hint target'), Action):
+    """Give a clue to another player.
+
+    hint is one character within (12345RBGWY),
+    target is the index of the player, relative to the current one.
+    """
+    __slots__ = ()
+
+    def __new__(cls, hint, target=1):
+        return super().__new__(cls, hint, target)
+
+    def __str__(self):
+        return 'c%s%d'%(self.hint, self.target)
+
+
+# Status codes of Game.step
+VALID = 0      # the action was applied
+INVALID = 1    # the action is not legal, nothing changed
+GAME_OVER = 2  # the action was applied, and the game is over
+
+# Byte codes: 0-4 play, 5-9 discard, 10-49 clue (10 hints for each of the 4 targets)
+HINTS = '12345RBGWY'
+HINT_INDEX = {hint: i for (i, hint) in enumerate(HINTS)}
+# Not an action: an old-style clue which cost a blue coin but was not given
+# (its target could not be parsed). Legacy replays need it.
+LOST_COIN = 255
+
+
+def encode(action):
+    "The byte code of an action."
+    if isinstance(action, Play):
+        return action.index-1
+    if isinstance(action, Discard):
+        return 5 + action.index-1
+    return 10 + (action.target-1)*10 + HINT_INDEX[action.hint]
+
+
+def decode(code):
+    "The action of a byte code (LOST_COIN is returned as is)."
+    if code < 5:
+        return Play(code+1)
+    if code < 10:
+        return Discard(code-4)
+    if code < 50:
+        return Clue(HINTS[(code-10)%10], (code-10)//10 + 1)
+    if code == LOST_COIN:
+        return code
+    raise ValueError("%d is not a valid action code."%code)
+
+
+def parse(text):
+    """The action of a prompt code: p3, d1, cR (a Red clue to the next player)
+    or cR2 (the target being relative to the current player, not an initial).
+    Raise ValueError if it is not one."""
+    text = text.strip()
+    try:
+        if text[0] == 'p':
+            return Play(int(text[1:]))
+        if text[0] == 'd':
+            return Discard(int(text[1:]))
+        if text[0] == 'c' and text[1].upper() in HINTS:
+            return Clue(text[1].upper(), int(text[2:] or 1))
+    except (IndexError, ValueError):
+        pass
+    raise ValueError("%r is not a valid move."%text)
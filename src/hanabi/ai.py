@@ -1,32 +1,80 @@
 """
 Artificial Intelligence to play Hanabi.
+
+AIs are looked up by name with by_name(): 'Cheater' is a class of this
+module, 'mymodule.MyAI' a class of another module, imported on demand.
 """
 
 import itertools
 import random
+import time
+from importlib import import_module
+
+from .action import Play, Discard, Clue, decode
+from .view import PlayerView, PrivilegedView
+
+
+def by_name(name, imports=True):
+    """The AI class of this name: a subclass of AI of hanabi.ai, or 'module.Class'
+    (unless imports is False: module is then not imported). Raise ValueError else."""
+    module, _, class_name = name.rpartition('.')
+    cls = None
+    if not module:
+        cls = globals().get(class_name)
+    elif imports:
+        try:
+            cls = getattr(import_module(module), class_name, None)
+        except ImportError:
+            pass
+    if not (isinstance(cls, type) and issubclass(cls, AI) and cls is not AI):
+        raise ValueError("%s is not a known AI."%name)
+    return cls
+
 
 class AI:
     """
     AI base class: some basic functions, game analysis.
+
+    An AI only looks at the game through self.view: what the current
+    player sees, a hanabi.view.PlayerView (of the class view_class).
+    Only the AIs which see everything (a PrivilegedView) also get self.game.
     """
+    view_class = PlayerView
+
     def __init__(self, game):
-        self.game = game
+        self.view = self.view_class(game)
+        if issubclass(self.view_class, PrivilegedView):
+            self.game = game
 
     @property
     def other_hands(self):
-        "The list of other players' hands."
-        return self.game.hands[1:]
+        "The list of other players' hands (hanabi.view.HandView)."
+        return self.view.other_hands
 
     @property
     def other_players_cards(self):
         "All of other players's cards, concatenated in a single list."
-        # return sum([x.cards for x in self.other_hands], [])
-        return list(itertools.chain.from_iterable([hand.cards for hand in self.other_hands]))
+        return list(itertools.chain.from_iterable(self.view.other_hands))
+
+    # What a player knows of its card is card.mask (see hanabi.deck.Card, and
+    # view.hand): these tests only use what the owner of the card knows.
+
+    def surely_playable(self, card):
+        "Whether the card is playable, whatever it is."
+        return card.mask & ~self.view.playable_mask == 0
+
+    def surely_dead(self, card):
+        "Whether the card is useless, whatever it is."
+        return card.mask & ~self.view.dead_mask == 0
+
+    def maybe_critical(self, card):
+        "Whether the card may be the last one of its kind."
+        return card.mask & self.view.critical_mask != 0
 
 
 class Cheater(AI):
     """
-    This player can see his own cards!
+    This player can see his own cards! (with a hanabi.view.PrivilegedView)
 
     Algorithm:
       * if 1-or-more card is playable: play the lowest one, then newest one
@@ -35,53 +83,59 @@ class Cheater(AI):
       * if blue_coin<8: discard the largest one, except if it's the last of its kind or in chop position in his opponent.
     """
 
+    view_class = PrivilegedView
+
     def play(self):
-        "Return the best cheater action."
-        game = self.game
+        "Return the best cheater action (an Action object)."
+        view = self.view
         playable = [ (i+1, card.number) for (i, card) in
-                     enumerate(game.current_hand.cards)
-                     if game.piles[card.color]+1 == card.number ]
+                     enumerate(view.cards)
+                     if card.kind in view.playable ]
 
         if playable:
             # sort by ascending number, then newest
             playable.sort(key=lambda p: (p[1], -p[0]))
-            game.log('Cheater would play:', "p%d"%playable[0][0], end=' ')
+            act = Play(playable[0][0])
+            view.log('Cheater would play:', act, end=' ')
             if (len(playable) > 1):
-                game.log('but could also pick:', playable[1:])
+                view.log('but could also pick:', playable[1:])
             else:
-                game.log()
+                view.log()
 
-            return "p%d"%playable[0][0]
+            return act
 
         #
         discardable = [ i+1 for (i, card) in
-                        enumerate(game.current_hand.cards)
-                        if ( (card.number <= game.piles[card.color])
-                             or (game.current_hand.cards.count(card) > 1)
+                        enumerate(view.cards)
+                        if ( view.played[card.kind]
+                             or (view.in_hands[0][card.kind] > 1)
                         ) ]
         # discard already played cards, doubles in my hand
         # fixme: discard doubles, if I see it in partner's hand
         # fixme: il me manque les cartes sup d'une pile morte
 
-        if discardable and (game.blue_coins < 8):
-            game.log('Cheater would discard:', "d%d"%discardable[0], discardable)
-            return "d%d"%discardable[0]
+        if discardable and (view.blue_coins < 8):
+            act = Discard(discardable[0])
+            view.log('Cheater would discard:', act, discardable)
+            return act
 
         ## 2nd type of discard: I have a card, and my partner too
 
-        discardable2 = [ i+1 for (i, card) in enumerate(game.current_hand.cards)
-                         if card in self.other_players_cards
+        other_counts = view.in_hands[1:]
+        discardable2 = [ i+1 for (i, card) in enumerate(view.cards)
+                         if any(counts[card.kind] for counts in other_counts)
                        ]
-        if discardable2 and (game.blue_coins < 8):
-            game.log('Cheater would discard2:', "d%d"%discardable2[0], discardable2)
-            return "d%d"%discardable2[0]
+        if discardable2 and (view.blue_coins < 8):
+            act = Discard(discardable2[0])
+            view.log('Cheater would discard2:', act, discardable2)
+            return act
 
 
         ## Look at precious cards in other hand, to clue them
         precious = [ card for card in
                      self.other_players_cards
-                     if (1+game.discard_pile.cards.count(card))
-                         == game.deck.card_count[card.number]
+                     if (1+view.discarded[card.kind])
+                         == view.kind_count[card.kind]
                    ]
         precious = []  # FIXME : temporarily disable this feature, it doesn't work for 3+ players (save clue is given to the wrong player)
         if precious:
@@ -89,50 +143,133 @@ class Cheater(AI):
             # this loop is such that we prefer to clue a card close to chop
             # would be nice to clue an unclued first, instead of an already clued
             for p in precious:
-                # game.log(p, p.number_clue, p.color_clue)
+                # view.log(p, p.number_clue, p.color_clue)
                 if p.number_clue is False:
-                    clue = "c%d"%p.number
+                    clue = Clue(str(p.number))
                     break
                 if p.color_clue is False:
-                    clue = "c%s"%p.color
-                    clue = clue[:2]   # quick fix, with 3+ players, can't clue cRed anymore, only cR
+                    clue = Clue(str(p.color)[0])
                     break
                 # this one was tricky:
                 # don't want to give twice the same clue
             if clue:
-                game.log('Cheater would clue a precious:',
+                view.log('Cheater would clue a precious:',
                        clue, precious)
-                if game.blue_coins > 0:
+                if view.blue_coins > 0:
                     return clue
-                game.log("... but there's no blue coin left!")
+                view.log("... but there's no blue coin left!")
 
 
         # if reach here, can't play, can't discard safely, no card to clue-save
         # Let's give a random clue, to see if partner can unblock me
-        if game.blue_coins >0:
-            game.log ('Cheater would clue randomly:')
-            return 'c'+random.choice('12345RGBWY')
+        if view.blue_coins >0:
+            view.log ('Cheater would clue randomly:')
+            return Clue(random.choice('12345RGBWY'))
 
         # If reach here, can't play, can't discard safely
         # No blue-coin left.
         # Must discard a card. Let's choose a non-precious one (preferably a 4)
         mynotprecious = [ (card.number, i+1) for (i, card) in
-                          enumerate(game.current_hand.cards)
+                          enumerate(view.cards)
                           if not (
-                                  (1+game.discard_pile.cards.count(card))
-                                  == game.deck.card_count[card.number])
+                                  (1+view.discarded[card.kind])
+                                  == view.kind_count[card.kind])
                      ]
         mynotprecious.sort(key=lambda p: (-p[0], p[1]))
         if mynotprecious:
-            act = 'd%d'%mynotprecious[0][1]
-            game.log('Cheater is trapped and must discard:', act, mynotprecious)
+            act = Discard(mynotprecious[0][1])
+            view.log('Cheater is trapped and must discard:', act, mynotprecious)
             return act
 
         # Oh boy, not even a safe discard, this is gonna hurt!
         # it's a loss. Discard the biggest
-        myprecious = [ (card.number, i+1) for (i, card) in enumerate(game.current_hand.cards) ]
+        myprecious = [ (card.number, i+1) for (i, card) in enumerate(view.cards) ]
         myprecious.sort(key=lambda p: (-p[0], p[1]))
-        act = 'd%d'%myprecious[0][1]
-        game.log('Cheater is doomed and must discard:', act, myprecious)
+        act = Discard(myprecious[0][1])
+        view.log('Cheater is doomed and must discard:', act, myprecious)
+        return act
+
+
+
+class MCTS(AI):
+    """
+    Information-set Monte Carlo tree search: this player does not see its own cards.
+
+    Each move, it samples many possible worlds (its own cards and the deck),
+    consistent with what it sees and the clues it got, and plays them
+    out from a search tree (see hanabi.mcts).
+
+    budget is the time limit of a move, in milliseconds (None for no limit),
+    and iterations the maximum number of iterations per move (None for no limit,
+    one of them must be given).
+    self.iterations is the number of iterations of the last move.
+
+    The tree of a seat is reused at its next turn (the branch of the moves played since).
+    With an executor (a concurrent.futures thread or process pool), each move
+    runs `jobs` independent searches in parallel (all of them stop at the deadline
+    of the move, even those which waited for a worker), and sums their statistics:
+    trees are then not reused.
+    """
+
+    def __init__(self, game, budget=100, iterations=None, executor=None, jobs=1, seed=None):
+        if budget is None and iterations is None:
+            raise ValueError("MCTS needs a budget or a number of iterations")
+        super().__init__(game)
+        from . import mcts
+        self._mcts = mcts
+        self.budget = budget
+        self.max_iterations = iterations
+        self.executor = executor
+        self.jobs = jobs
+        self.rng = random.Random(seed)
+        self.iterations = 0
+        self._trees = {}  # seat -> (root, game history at its move, deal token)
+
+    def play(self):
+        "Return the most visited move of the search (an Action object)."
+        mcts, view = self._mcts, self.view
+        obs = mcts.observe(view)
+        deadline = None if self.budget is None else time.perf_counter() + self.budget/1000
+
+        if self.executor is not None:
+            iterations = self.max_iterations and -(-self.max_iterations // self.jobs)
+            # the deadline of the move: the jobs which wait for a worker don't run over it
+            futures = [self.executor.submit(mcts.search, obs, None, iterations,
+                                            self.rng.getrandbits(32), deadline)
+                       for _ in range(self.jobs)]
+            stats = {}
+            for future in futures:
+                for code, (visits, total) in future.result().items():
+                    v, t = stats.get(code, (0, 0))
+                    stats[code] = (v+visits, t+total)
+            self.iterations = sum(visits for (visits, _) in stats.values())
+        else:
+            root = self._reused_tree(view)
+            self.iterations = mcts.run(root, obs, deadline, self.max_iterations, self.rng)
+            self._trees[view.seat] = (root, view.history, view.deal_token)
+            stats = {code: (child.visits, child.total) for (code, child) in root.children.items()}
+
+        if stats:
+            code = mcts.best_move(stats)
+        else:
+            code = mcts.fallback(obs, self.rng)
+        act = decode(code)
+        view.log('MCTS would play:', act, '(%d iterations)'%self.iterations)
         return act
 
+    def _reused_tree(self, view):
+        """The subtree of the current position, in the tree of the last move of this seat,
+        or a new tree if this move was undone (or the game reset) since."""
+        node = None
+        history = view.history
+        if view.seat in self._trees:
+            root, played, deal = self._trees[view.seat]
+            if deal is view.deal_token and history.startswith(played):
+                node = root
+                for code in history[len(played):]:
+                    node = node.children.get(code)
+                    if node is None:
+                        break
+        if node is None:
+            node = self._mcts.Node()
+        return node
@@ -0,0 +1,237 @@
+"""
+Batch engine: plays N games in lockstep, with NumPy.
+
+The N game states are arrays, one row per game (deck order, hands, piles,
+coins, clue masks), and each step applies one action per game with
+vectorized operations. Cards are stored by kind (see hanabi.deck.CARD_KINDS),
+and -1 marks an empty hand slot.
+
+Usage:
+
+    >>> import hanabi.batch
+    >>> batch = hanabi.batch.BatchGame.random(1000, players=3)
+    >>> scores = batch.run(hanabi.batch.BatchCheater())
+
+NumPy is only needed by this module.
+
+.. autosummary::
+   BatchGame
+   BatchCheater
+"""
+
+import random
+
+import numpy as np
+
+from .deck import Deck, CARD_KINDS
+
+# action types
+PLAY, DISCARD, CLUE = 0, 1, 2
+# clue hints: 0-4 for colors (as COLORS), 5-9 for numbers 1-5
+EMPTY = -1
+
+NKINDS = len(CARD_KINDS)
+KIND_COUNT = np.array(Deck.kind_count)
+KIND_COLOR = np.arange(NKINDS) // 5
+KIND_NUMBER = np.arange(NKINDS) % 5 + 1
+
+
+def deck_kinds(deck):
+    "List of the card kinds of a Deck (or a list of cards), in drawing order."
+    if isinstance(deck, Deck):
+        deck = deck.cards
+    return [card.kind for card in deck]
+
+
+class BatchGame:
+    """N games of Hanabi, with the same number of players, played in lockstep.
+
+    All games start together, so the current seat is the same for all of them.
+    A finished game (3 red coins, 25 points, or last round over) is frozen.
+    """
+
+    def __init__(self, decks, players=2):
+        "decks is a list of Deck (or of lists of cards), or an (N, 50) array of card kinds."
+        if isinstance(decks, np.ndarray):
+            self.decks = decks.astype(np.int8, copy=False)
+        else:
+            self.decks = np.array([deck_kinds(d) for d in decks], dtype=np.int8)
+        self.n = len(self.decks)
+        self.nplayers = players
+        self.hand_size = Deck.cards_by_player[players]
+        n, p, h = self.n, self.nplayers, self.hand_size
+        self.rows = np.arange(n)
+
+        self.hands = self.decks[:, :p*h].reshape(n, p, h).copy()
+        self.position = np.full(n, p*h)
+        self.color_clued = np.zeros((n, p, h), dtype=bool)
+        self.number_clued = np.zeros((n, p, h), dtype=bool)
+        self.piles = np.zeros((n, 5), dtype=np.int8)
+        self.discarded = np.zeros((n, NKINDS), dtype=np.int8)
+        self.blue_coins = np.full(n, 8)
+        self.red_coins = np.zeros(n, dtype=np.int8)
+        # turns left once the deck is empty, -1 before
+        self.last_turns = np.full(n, -1)
+        self.done = np.zeros(n, dtype=bool)
+        self.turns = 0
+
+    @classmethod
+    def random(cls, n, players=2, rng=random):
+        "N games on decks shuffled with rng."
+        kinds = deck_kinds(Deck())
+        decks = np.empty((n, len(kinds)), dtype=np.int8)
+        for deck in decks:
+            rng.shuffle(kinds)
+            deck[:] = kinds
+        return cls(decks, players)
+
+    @classmethod
+    def from_pool(cls, pool, players=2, start=0, stop=None):
+        "Games on the decks start:stop of a DeckPool, read without copy."
+        # card kinds are < 25: int8 bytes, which BatchGame does not copy
+        decks = np.frombuffer(pool.view(start, stop), dtype=np.int8)
+        decks = decks.reshape(-1, pool.deck_size)
+        return cls(decks, players)
+
+    @property
+    def seat(self):
+        "Current seat, the same in all games."
+        return self.turns % self.nplayers
+
+    @property
+    def scores(self):
+        return np.where(self.red_coins >= 3, 0, self.piles.sum(axis=1))
+
+    def _remove(self, mask, slot):
+        "Remove the card at slot from current hands (where mask), and draw a new one."
+        seat = self.seat
+        h = self.hand_size
+        j = np.arange(h)
+        src = np.minimum(j + (j >= slot[:, None]), h-1)
+        can_draw = mask & (self.position < self.decks.shape[1])
+        new = np.where(can_draw,
+                       self.decks[self.rows, np.minimum(self.position, self.decks.shape[1]-1)],
+                       EMPTY)
+        self.position += can_draw
+        for array, last in ((self.hands, new),
+                            (self.color_clued, False),
+                            (self.number_clued, False)):
+            hand = array[:, seat]
+            shifted = np.take_along_axis(hand, src, axis=1)
+            shifted[:, -1] = last
+            hand[mask] = shifted[mask]
+
+    def step(self, action, arg, target=None):
+        """Play one turn in every unfinished game.
+
+        action is an array of PLAY, DISCARD or CLUE, arg the (0-based) slot
+        to play or discard, or the clue hint. target is the clue target,
+        relative to the current player (1 by default).
+        Actions are assumed to be valid.
+        """
+        rows = self.rows
+        active = ~self.done
+        seat = self.seat
+        self.last_turns[active & (self.last_turns < 0)
+                        & (self.position == self.decks.shape[1])] = self.nplayers
+
+        hand = self.hands[:, seat]
+        card = hand[rows, np.where(action == CLUE, 0, arg)]
+        color = card // 5
+        number = card % 5 + 1
+
+        play = active & (action == PLAY)
+        success = play & (self.piles[rows, color]+1 == number)
+        self.piles[rows[success], color[success]] += 1
+        bonus = success & (number == 5) & (self.blue_coins < 8)
+        self.blue_coins += bonus
+
+        discard = active & (action == DISCARD)
+        lost = discard | (play & ~success)
+        self.discarded[rows[lost], card[lost]] += 1
+        self.blue_coins += discard
+        self.red_coins += play & ~success
+        self._remove(play | discard, arg)
+
+        clue = active & (action == CLUE)
+        if clue.any():
+            if target is None:
+                target = np.ones(self.n, dtype=int)
+            target_seat = (seat + target) % self.nplayers
+            target_hand = self.hands[rows, target_seat]
+            hint = arg[:, None]
+            by_color = clue[:, None] & (hint < 5) & (target_hand >= 0) & (target_hand // 5 == hint)
+            by_number = clue[:, None] & (hint >= 5) & (target_hand >= 0) & (target_hand % 5 == hint-5)
+            self.color_clued[rows, target_seat] |= by_color
+            self.number_clued[rows, target_seat] |= by_number
+            self.blue_coins -= clue
+
+        self.last_turns[active & (self.last_turns > 0)] -= 1
+        self.done |= (self.red_coins >= 3) | (self.piles.sum(axis=1) == 25) | (self.last_turns == 0)
+        self.turns += 1
+
+    def run(self, policy):
+        "Play all games until the end, with policy(batch) -> (action, arg, target). Return the scores."
+        while not self.done.all():
+            self.step(*policy(self))
+        return self.scores
+
+
+class BatchCheater:
+    """Vectorized Cheater (see hanabi.ai.Cheater): same decisions, hence same scores.
+
+    The only difference is the random clue, replaced by a number clue on the
+    first card of the next player: a clue's effect on the score is only to spend a blue coin.
+    """
+
+    def __call__(self, batch):
+        n, h = batch.n, batch.hand_size
+        rows = batch.rows[:, None]
+        seat = batch.seat
+        j = np.arange(h)
+
+        hand = batch.hands[:, seat]
+        valid = hand >= 0
+        kind = np.where(valid, hand, 0)
+        number = KIND_NUMBER[kind]
+        pile = batch.piles[rows, KIND_COLOR[kind]]
+        big = 100
+
+        # play the lowest playable card, then the newest
+        playable = valid & (number == pile+1)
+        play_slot = np.argmin(np.where(playable, number*2*h + (h-1-j), big), axis=1)
+
+        # discard already played cards, doubles in my hand
+        double = ((hand[:, :, None] == hand[:, None, :]).sum(axis=2) > 1)
+        discardable = valid & ((number <= pile) | double)
+        # 2nd type of discard: I have a card, and my partner too
+        others = np.delete(batch.hands, seat, axis=1).reshape(n, -1)
+        discardable2 = valid & (hand[:, :, None] == others[:, None, :]).any(axis=2)
+
+        # clue the first card of the next player
+        next_hand = batch.hands[:, (seat+1) % batch.nplayers]
+        hint = 5 + next_hand[:, 0] % 5
+
+        # trapped: discard the largest non-precious card, or the largest one
+        precious = batch.discarded[rows, kind]+1 == KIND_COUNT[kind]
+        key = (5-number)*h + j
+        notprecious = valid & ~precious
+        trapped_slot = np.where(notprecious.any(axis=1),
+                                np.argmin(np.where(notprecious, key, big), axis=1),
+                                np.argmin(np.where(valid, key, big), axis=1))
+
+        can_discard = batch.blue_coins < 8
+        action = np.full(n, DISCARD)
+        arg = trapped_slot
+        use_clue = batch.blue_coins > 0
+        action[use_clue] = CLUE
+        arg = np.where(use_clue, hint, arg)
+        for mask, slot in ((discardable2, np.argmax(discardable2, axis=1)),
+                           (discardable, np.argmax(discardable, axis=1))):
+            take = mask.any(axis=1) & can_discard
+            action[take] = DISCARD
+            arg = np.where(take, slot, arg)
+        has_play = playable.any(axis=1)
+        action[has_play] = PLAY
+        arg = np.where(has_play, play_slot, arg)
+        return action, arg, None
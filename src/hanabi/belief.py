@@ -0,0 +1,135 @@
+"""
+Beliefs of a player about its own cards, with NumPy.
+
+A player sees the other hands, the piles and the discard pile, and knows
+the mask of each of its cards (the kinds it may be, see hanabi.deck.Card).
+The probability that a card is of a given kind is taken proportional to
+the number of unseen cards of this kind, among the kinds of its mask.
+All the cards of the hand are computed at once, as an (hand size, 25) array.
+
+The unseen counts are kept up to date move by move (see Belief.update),
+from the game history: nothing is recounted.
+
+Usage:
+
+    >>> import hanabi.belief
+    >>> belief = hanabi.belief.Belief(game)   # of the current player
+    >>> belief.p_playable()                   # after any number of moves
+    array([0.2, 0.2, 1. , 0.2, 0.2])
+
+NumPy is only needed by this module.
+
+.. autosummary::
+   Belief
+   distribution
+   mask_matrix
+"""
+
+import numpy as np
+
+from .deck import Deck, CARD_KINDS
+
+NKINDS = len(CARD_KINDS)
+KIND_BITS = 1 << np.arange(NKINDS, dtype=np.int64)
+
+
+def mask_matrix(masks):
+    "The (len(masks), 25) boolean array of a list of masks (or of a mask)."
+    return (np.asarray(masks, dtype=np.int64)[..., None] & KIND_BITS) != 0
+
+
+def distribution(masks, unseen):
+    """Probability of each kind, for cards of these masks, unseen being the
+    number of cards of each kind the player does not see. One row per mask."""
+    weights = mask_matrix(masks) * np.asarray(unseen)
+    total = weights.sum(axis=-1, keepdims=True)
+    return weights / np.maximum(total, 1)
+
+
+class Belief:
+    """What a seat (the current player by default) may infer about its own cards.
+
+    update() follows the moves played since the last call, and counts
+    everything again if the history does not start with the one of the last
+    call (moves were undone, and maybe others played) or if the game was
+    reset. The queries call it, so a Belief may be created once, and queried
+    at any time.
+    """
+
+    def __init__(self, game, seat=None):
+        self.game = game
+        self.seat = game.seat if seat is None else seat
+        self._reset()
+
+    def _reset(self):
+        "Count everything, from the current state of the game."
+        game = self.game
+        nplayers = len(game._players)
+        # deck index of each card in hand, by seat, to know what is drawn and revealed
+        index = {id(card): i for (i, card) in enumerate(game.deck._cards)}
+        self._hands = [[index[id(card)] for card in hand.cards] for hand in game._hands]
+        self._position = game.deck.position
+        self._history = bytes(game.history)  # the history at the last update
+        self._deck = game.deck
+        self._actor = game.seat  # seat of the next move
+        self._nplayers = nplayers
+
+        unseen = np.array(Deck.kind_count, dtype=np.int64)
+        unseen -= np.array(game.discarded, dtype=np.int64)
+        unseen -= np.array(game.played, dtype=np.int64)
+        for seat, hand in enumerate(game._hands):
+            if seat != self.seat:
+                for card in hand.cards:
+                    unseen[card.kind] -= 1
+        self.unseen = unseen
+
+    def update(self):
+        "Take the moves played since the last update into account."
+        game = self.game
+        cards = game.deck._cards
+        history = game.history
+        if game.deck is not self._deck or not history.startswith(self._history):
+            self._reset()  # moves were undone (and others played), or the game was reset
+            return
+        if len(history) == len(self._history):
+            return
+        for code in history[len(self._history):]:
+            if code >= 50:  # LOST_COIN is not a move
+                continue
+            actor = self._actor
+            if code < 10:
+                hand = self._hands[actor]
+                removed = hand.pop(code % 5)
+                if actor == self.seat:
+                    self.unseen[cards[removed].kind] -= 1  # my card is revealed
+                if self._position < len(cards):
+                    if actor != self.seat:
+                        self.unseen[cards[self._position].kind] -= 1  # I see the new card
+                    hand.append(self._position)
+                    self._position += 1
+            self._actor = (actor+1) % self._nplayers
+        self._history = bytes(history)
+
+    def distribution(self):
+        "Probability of each kind (columns), for each card of the hand (rows)."
+        self.update()
+        return distribution(self.game._hands[self.seat].masks, self.unseen)
+
+    def _probability(self, kinds_mask):
+        return self.distribution() @ ((kinds_mask & KIND_BITS) != 0)
+
+    def p_playable(self):
+        "Probability that each card is playable."
+        return self._probability(self.game.playable_mask)
+
+    def p_critical(self):
+        "Probability that each card is the last one of its kind (and still useful)."
+        return self._probability(self.game.critical_mask)
+
+    def p_dead(self):
+        "Probability that each card is useless."
+        return self._probability(self.game.dead_mask)
+
+    def p_safe_discard(self):
+        "Probability that discarding each card loses no point: it is not critical."
+        return 1 - self.p_critical()
@@ -4,22 +4,31 @@ Hanabi deck and game engine module.
 See also the program hanabi.
 
 .. autosummary::
+   Color
    Card
    Hand
    Deck
+   DeckPool
    Game
+
+Game keeps a Zobrist hash of its state, see hanabi.zobrist, and reports
+what happens to its observers, see hanabi.events.
 """
 
 import os
-import copy
 import random
-import readline  # this greatly improves `input`
+import struct
+from collections import namedtuple
+from collections.abc import Sequence
 
 from enum import Enum
 from enum import unique
 
-from . import ascii_art
-from . import ai
+from . import zobrist
+from .events import (TextLog, GameStart, Played, Misplayed, Discarded, Clued, Drew, GameEnd,
+                     PERFECT, RED_COINS, DECK_EXHAUSTED, INTERRUPTED)
+from .action import (Action, Play, Discard, Clue, HINTS, HINT_INDEX, LOST_COIN, decode,
+                     VALID, INVALID, GAME_OVER)
 
 
 @unique
@@ -53,17 +62,53 @@ class Color(Enum):
             return s
 
 
+# The 25 card kinds. A card's kind is a small int: color index * 5 + (number-1),
+# colors being indexed in the order of list(Color).
+COLORS = tuple(Color)
+CARD_KINDS = tuple((color, number) for color in COLORS for number in range(1, 6))
+CARD_NAMES = tuple(str(color)[0] + str(number) for (color, number) in CARD_KINDS)
+# the kinds of each color
+COLOR_KINDS = tuple(frozenset(range(i*5, i*5+5)) for i in range(len(COLORS)))
+# Color index, from a Color, its name or its initial (Card('R', 4) is valid)
+COLOR_INDEX = {}
+for _i, _color in enumerate(COLORS):
+    COLOR_INDEX[_color] = COLOR_INDEX[_color.name] = COLOR_INDEX[_color.name[0]] = _i
+
+# What a player knows of a card is a 25-bit mask of the kinds it may be (bit 1 << kind).
+ALL_KINDS = (1 << len(CARD_KINDS)) - 1
+COLOR_MASKS = tuple(sum(1 << kind for kind in kinds) for kinds in COLOR_KINDS)
+NUMBER_MASKS = tuple(sum(1 << (color*5 + number) for color in range(len(COLORS)))
+                     for number in range(5))
+# mask of the kinds touched by a clue (within 12345RBGWY)
+HINT_MASKS = dict(zip('12345', NUMBER_MASKS))
+for _i, _color in enumerate(COLORS):
+    HINT_MASKS[_color.name[0]] = COLOR_MASKS[_i]
+
+
+def mask_kinds(mask):
+    "The list of kinds of a mask."
+    return [kind for kind in range(len(CARD_KINDS)) if mask >> kind & 1]
+
+
 class Card:
-    "A hanabi card."
+    """A hanabi card.
+
+    Its kind (see CARD_KINDS) is computed once, so comparing, hashing and
+    counting cards are integer operations.
+    mask is what its owner knows of it: the kinds it may be (see ALL_KINDS),
+    narrowed by every clue given to its hand, touching it or not.
+    """
+    __slots__ = ('color', 'number', 'kind', 'mask')
+
     def __init__(self, color=None, number=None):
         assert (1 <= number <= 5), "Wrong number"
         self.color = color
         self.number = number
-        self.color_clue = False
-        self.number_clue = False
+        self.kind = COLOR_INDEX[color]*5 + number-1
+        self.mask = ALL_KINDS
 
     def __str__(self):
-        return (str(self.color)[0] + str(self.number))
+        return CARD_NAMES[self.kind]
 
     def __repr__(self):
         return ("Card(%r, %d)"%(self.color, self.number))
@@ -76,7 +121,28 @@ class Card:
         """Return whether 2 cards are equal.
         Can compare 2 Card objects or their string value.
         """
-        return str(self) == str(c)
+        if isinstance(c, Card):
+            return self.kind == c.kind
+        return CARD_NAMES[self.kind] == str(c)
+
+    def __hash__(self):
+        return self.kind
+
+    @property
+    def color_clue(self):
+        "The initial of the color, if its owner knows it (from the mask), else False."
+        for i, color_mask in enumerate(COLOR_MASKS):
+            if self.mask & ~color_mask == 0:
+                return COLORS[i].name[0]
+        return False
+
+    @property
+    def number_clue(self):
+        "The number (a str), if its owner knows it (from the mask), else False."
+        for i, number_mask in enumerate(NUMBER_MASKS):
+            if self.mask & ~number_mask == 0:
+                return str(i+1)
+        return False
 
     def str_clue(self):
         "What I know about this card."
@@ -101,18 +167,30 @@ class Hand:
         return str(self)
 
     def str_clue(self):
+        "What the owner knows of these cards: color and number, * when unknown."
         return " ".join([c.str_clue() for c in self.cards])
 
+    @property
+    def masks(self):
+        "What the owner knows of these cards: the list of their masks (see Card)."
+        return [c.mask for c in self.cards]
+
     def pop(self, i):
         "Pop a card from the hand, and draw a new one."
-        if not 1 <= i <= len(self):
+        cards = self.cards
+        if not 1 <= i <= len(cards):
             raise ValueError("%d is not a valid card index."%i)
         i = i-1   # back to 0-based-indices
-        card = self.cards.pop(i)
+        card = cards[i]
         try:
-            self.cards.append(self._deck.draw())
+            new = self._deck.draw()
         except IndexError:
-            pass  # deck is empty
+            del cards[i]  # deck is empty, the hand shrinks
+            return card
+        # fixed slots: the next cards shift left, the new one takes the last slot
+        for j in range(i, len(cards)-1):
+            cards[j] = cards[j+1]
+        cards[-1] = new
         return card
 
     def append(self, c): self.cards.append(c)
@@ -128,18 +206,30 @@ class Deck:
     """
     # Rules for making decks:
     card_count = {1: 3, 2: 2, 3: 2, 4: 2, 5: 1}
+    # the same, indexed by card kind
+    kind_count = tuple([3, 2, 2, 2, 1]*len(COLORS))
+    deck_size = 50
     # Rules for dealing:
     cards_by_player = {2: 5, 3: 5, 4: 4, 5: 4}
 
     def __init__(self, cards=None):
         if cards is None:
-            self.cards = []
+            cards = []
             for number, count in self.card_count.items():
                 for color in list(Color):
                     for _ in range(count):
-                        self.cards.append(Card(color, number))
-        else:
-            self.cards = cards
+                        cards.append(Card(color, number))
+        # drawn cards are not removed: position is the index of the next card to draw
+        self._cards = cards
+        self.position = 0
+
+    @property
+    def cards(self):
+        "The list of cards left in the deck (a copy)."
+        return self._cards[self.position:]
+
+    def __len__(self):
+        return len(self._cards) - self.position
 
     def __str__(self):
         return " ".join([c.str_color() for c in self.cards])
@@ -150,12 +240,36 @@ class Deck:
         s += ']'
         return s
 
-    def shuffle(self):
-        random.shuffle(self.cards)
+    def shuffle(self, rng=random):
+        "Shuffle the cards left in the deck (with rng, a random.Random, or the random module)."
+        cards = self.cards
+        rng.shuffle(cards)
+        self._cards[self.position:] = cards
+
+    @classmethod
+    def from_seed(cls, seed):
+        """A deck shuffled by its own random.Random(seed).
+        The same seed always gives the same deck, so a game may be recorded by its seed.
+        """
+        deck = cls()
+        deck.shuffle(random.Random(seed))
+        return deck
+
+    def to_bytes(self):
+        "The whole deck (drawn cards included), one byte (card kind) per card."
+        return bytes([card.kind for card in self._cards])
+
+    @classmethod
+    def from_bytes(cls, data):
+        "A new deck from to_bytes' output."
+        return cls([Card(*CARD_KINDS[kind]) for kind in data])
 
     def draw(self):
         "Draw a card from the deck."
-        return self.cards.pop(0)
+        if self.position >= len(self._cards):
+            raise IndexError("The deck is empty.")
+        self.position += 1
+        return self._cards[self.position-1]
 
     def deal(self, nhands):
         "Deal n hands and return them."
@@ -165,6 +279,137 @@ class Deck:
         return hands
 
 
+class DeckPool:
+    """A file of decks, in Deck.to_bytes format (50 bytes per deck).
+
+    The file is memory-mapped: opening it in several processes shares it,
+    and pool[i] is a slice of the mapping, not a copy.
+
+        >>> DeckPool.create('decks.bin', 1000000)
+        >>> pool = DeckPool('decks.bin')
+        >>> game = Game(2, cards=pool.deck(42).cards)
+    """
+    deck_size = Deck.deck_size
+
+    def __init__(self, filename):
+        import mmap
+        f = open(filename, 'rb')
+        self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        f.close()
+        self._view = memoryview(self._map)
+
+    @staticmethod
+    def create(filename, n, first_seed=0):
+        "Write a pool of n decks, the ith one being Deck.from_seed(first_seed+i)."
+        f = open(filename, 'wb')
+        for seed in range(first_seed, first_seed+n):
+            f.write(Deck.from_seed(seed).to_bytes())
+        f.close()
+
+    def __len__(self):
+        return len(self._map) // self.deck_size
+
+    def __getitem__(self, i):
+        "The bytes of deck i (a memoryview)."
+        if not 0 <= i < len(self):
+            raise IndexError("deck index out of range")
+        return self._view[i*self.deck_size:(i+1)*self.deck_size]
+
+    def view(self, start=0, stop=None):
+        "The bytes of decks start:stop (a memoryview)."
+        stop = len(self) if stop is None else min(stop, len(self))
+        return self._view[start*self.deck_size:stop*self.deck_size]
+
+    def deck(self, i):
+        "Deck number i, as a new Deck."
+        return Deck.from_bytes(self[i])
+
+
+class Counts(Sequence):
+    "Read-only view of a per-kind counter list: counts[card.kind]."
+    __slots__ = ('_items',)
+
+    def __init__(self, items):
+        self._items = items
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getitem__(self, i):
+        return self._items[i]
+
+    def __repr__(self):
+        return 'Counts(%r)'%self._items
+
+
+class Seats(Sequence):
+    """Read-only view of a per-seat list (players, hands),
+    rotated so that index 0 is always the current player.
+    Slicing returns a list.
+    """
+    __slots__ = ('_items', '_game')
+
+    def __init__(self, items, game):
+        self._items = items
+        self._game = game
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getitem__(self, i):
+        items = self._items
+        n = len(items)
+        seat = self._game.seat
+        if isinstance(i, slice):
+            return [items[(seat+j)%n] for j in range(*i.indices(n))]
+        if not -n <= i < n:
+            raise IndexError("seat index out of range")
+        return items[(seat+i)%n]
+
+    def __repr__(self):
+        return repr(self[:])
+
+
+# Game.to_bytes() layout, version 1 (123 bytes): version, number of players, seat,
+# turns, blue coins, red coins, deck position, end turn (255: None), the 5 piles,
+# the deck (50 card kinds), then the slots of the hands, in seat order
+# (Deck.cards_by_player per hand, 20 at most: deck index of the card, 255 if empty)
+# and their clues (see mask_code).
+STATE_VERSION = 1
+STATE_LAYOUT = struct.Struct('<8B5B50s20B20H')
+NO_CARD = 255
+
+
+def mask_code(mask):
+    """A clue mask, as 10 bits: its colors (bits 0-4) and numbers (bits 5-9).
+    Clues only remove colors or numbers, so a mask is all the kinds of these."""
+    code = 0
+    for i in range(5):
+        if mask & COLOR_MASKS[i]:
+            code |= 1 << i
+        if mask & NUMBER_MASKS[i]:
+            code |= 1 << (5+i)
+    if code_mask(code) != mask:
+        raise ValueError("%x is not a mask of clues."%mask)
+    return code
+
+
+def code_mask(code):
+    "The mask of a mask_code."
+    colors = numbers = 0
+    for i in range(5):
+        if code >> i & 1:
+            colors |= COLOR_MASKS[i]
+        if code >> (5+i) & 1:
+            numbers |= NUMBER_MASKS[i]
+    return colors & numbers
+
+
+State = namedtuple('State', 'position seat turns blue_coins red_coins piles hands clues '
+                   'discard_pile history moves discarded played in_deck in_hands sets hash end_turn')
+State.__doc__ = "A snapshot of a Game's state (see Game.snapshot)."
+
+
 class Game:
     """A game of Hanabi.
 
@@ -188,11 +433,30 @@ class Game:
         >>> game = hanabi.Game(players=2)
         >>> ai = hanabi.ai.Cheater(game)
         >>> game.turn(ai)  # the ai will play just once
+
+        >>> # Headless mode, for fast simulations: nothing is rendered,
+        >>> # printed or saved, and moves may be given as Action objects:
+        >>> game = hanabi.Game(players=2)
+        >>> game.headless = True
+        >>> game.turn(hanabi.action.Play(3))
+
+        >>> # Search AIs may explore moves, and come back:
+        >>> token = game.apply(hanabi.action.Discard(1))
+        >>> game.undo(token)
+        >>> state = game.snapshot()   # ... many moves later:
+        >>> game.restore(state)
+
+        >>> # Fast path: the legal moves, and status codes instead of exceptions
+        >>> game.legal_actions()
+        >>> status = game.step(hanabi.action.Play(1))   # VALID, INVALID or GAME_OVER
+        >>> game.hash   # 64-bit Zobrist hash of the state, updated by every action
+
+        >>> game.subscribe(observer)   # receives the events of the game, see hanabi.events
     """
 
     Players = ["Alice", "Benji", "Clara", "Dante", "Elric"]
 
-    def __init__(self, players=2, multi=False):
+    def __init__(self, players=2, multi=False, cards=None, seed=None):
         # Actions are functions that a player may do.
         # They should finish by a call to next_player, if needed.
         self.actions = {
@@ -202,38 +466,129 @@ class Game:
             'x': self.examine_piles,
             'l': self.load,
             '>': self.command,  # cheat-code !
-            '?': (lambda x: self.log(ai.Cheater(self).play()))
+            '?': self._cheat,
         }
-        self.reset(players, multi)
+        self.observers = []  # see subscribe
+        self._text_log = TextLog(self)
+        self.reset(players, multi, cards, seed)
         self.quiet = False
+        self.headless = False
+
+    def _cheat(self, *unused):
+        "Action: show what the Cheater AI would play."
+        from . import ai
+        self.log(ai.Cheater(self).play())
+
+    @property
+    def headless(self):
+        "Headless mode: no rendering, no autosave, no final message (implies quiet)."
+        return self._headless
+
+    @headless.setter
+    def headless(self, value):
+        self._headless = value
+        if value:
+            self.quiet = True
+
+    @property
+    def quiet(self):
+        "Quiet mode: no text output (the TextLog observer is unsubscribed)."
+        return self._quiet
+
+    @quiet.setter
+    def quiet(self, value):
+        self._quiet = value
+        if value:
+            self.unsubscribe(self._text_log)
+        elif self._text_log not in self.observers:
+            self.subscribe(self._text_log)
 
     def log(self, *args, **kwargs):
-        if self.quiet:
+        if self._quiet:
             pass
         else:
             print(*args, **kwargs)
 
+    def subscribe(self, observer):
+        "Send the events of this game to observer (see hanabi.events)."
+        self.observers.append(observer)
+
+    def unsubscribe(self, observer):
+        if observer in self.observers:
+            self.observers.remove(observer)
+
+    def _emit(self, event):
+        "Send an event to the observers (only called if there are some)."
+        if not self._started:
+            self._start()
+        for observer in self.observers:
+            observer.notify(event)
+
+    def _start(self):
+        self._started = True
+        if self.observers:
+            start = GameStart(list(self._players), self.seed, self.deck.to_bytes(),
+                              type(self.ai).__name__ if self.ai is not None else '')
+            for observer in self.observers:
+                observer.notify(start)
+
+    def _end(self, reason=None):
+        "Send game_end, once. reason is end_reason by default."
+        if self._ended:
+            return
+        self._ended = True
+        self._emit(GameEnd(self.score, self.turns, reason or self.end_reason))
+
+    @property
+    def end_reason(self):
+        "Why the game is over (see hanabi.events), None if it is not."
+        if self.red_coins >= 3:
+            return RED_COINS
+        if self.score == 25:
+            return PERFECT
+        if self.end_turn is not None and self.turns >= self.end_turn:
+            return DECK_EXHAUSTED
+        return None
+
+
+    def reset(self, players=2, multi=False, cards=None, seed=None):
+        """Reset this game.
 
-    def reset(self, players=2, multi=False, cards=None):
-        "Reset this game."
+        The deck is cards if given, else it is derived from seed (see Deck.from_seed),
+        a random one if seed is None. Cards are not copied, but nothing is known
+        of them: their masks are reset (see Card).
+        """
         if isinstance(players, int):
             assert(2 <= players <= 5)
-            self.players = self.Players[:players]
-        else:  # assume it's the list of players
-            self.players = players
+            players = self.Players[:players]
+        # players and hands are kept in seat order, self.seat is the current one,
+        # self.players and self.hands are views where the current player is 0
+        self._players = list(players)
+        self.seat = 0
+        self.players = Seats(self._players, self)
 
-        self.deck = Deck(cards)
         if cards is None:
-            self.deck.shuffle()
+            if seed is None:
+                seed = random.getrandbits(32)
+            self.deck = Deck.from_seed(seed)
+        else:
+            self.deck = Deck(list(cards))
+            for card in self.deck._cards:  # they may come from another game
+                card.mask = ALL_KINDS
+        self.seed = seed if cards is None else None
+        self.deal_token = object()  # a new one at each reset, see hanabi.view.PlayerView
 
-        # record starting deck and moves, for replay
+        # record moves, for replay (the deck never forgets its cards, see starting_deck)
         self.moves = []
-        self.starting_deck = copy.deepcopy(self.deck)
+        self.history = bytearray()  # byte codes of the valid moves, see hanabi.action.encode
+        self.turns = 0  # number of valid moves
 
-        self.hands = self.deck.deal(len(self.players))
+        self._hands = self.deck.deal(len(self.players))
+        self.hands = Seats(self._hands, self)
 
-        self.current_player = None
-        self.next_player()
+        # I keep these two constants for the moment:
+        self.current_player = 0
+        self.other_player = 1
         self.last_player = None  # will be set to the last player, to allow last turn
 
         self.discard_pile = Hand(None, 0)  # I don't give it the deck, so it can't draw accidentaly a card
@@ -241,10 +596,115 @@ class Game:
 
         self.blue_coins = 8
         self.red_coins = 0
+        self.end_turn = None  # once the deck is empty, the value of turns when the game ends
+        self._started = self._ended = False  # game_start and game_end events were sent
+
+        self._reset_counts()
+        self.hash = self.compute_hash()
 
         self.ai = None
 
 
+    def _reset_counts(self):
+        """Per card kind counters, kept up to date by every action:
+        discarded (including misplays), played, in each hand, in the deck.
+        Plus the derived sets of playable, dead and critical card kinds,
+        and the same as masks (playable_mask, dead_mask, critical_mask).
+        """
+        nkinds = len(CARD_KINDS)
+        self._discarded = [0]*nkinds
+        self._played = [0]*nkinds
+        self._in_deck = list(self.deck.kind_count)
+        self._in_hands = []
+        for hand in self._hands:
+            counts = [0]*nkinds
+            for card in hand.cards:
+                counts[card.kind] += 1
+                self._in_deck[card.kind] -= 1
+            self._in_hands.append(Counts(counts))
+        self.discarded = Counts(self._discarded)
+        self.played = Counts(self._played)
+        self.in_deck = Counts(self._in_deck)
+        self.in_hands = Seats(self._in_hands, self)
+
+        self.playable = self.dead = self.critical = frozenset()
+        self.playable_mask = self.dead_mask = self.critical_mask = 0
+        for color_index in range(len(COLORS)):
+            self._update_color(color_index)
+
+    def _update_color(self, color_index):
+        "Update the derived sets (playable, dead, critical) for the 5 kinds of this color."
+        first = color_index*5
+        pile = self.piles[COLORS[color_index]]
+        kind_count = self.deck.kind_count
+        playable, dead, critical = [], [], []
+        playable_bits = dead_bits = critical_bits = 0
+        blocked = False  # a lower card is lost forever
+        for kind in range(first, first+5):
+            number = kind - first + 1
+            if number <= pile or blocked:
+                dead.append(kind)
+                dead_bits |= 1 << kind
+            else:
+                if number == pile+1:
+                    playable.append(kind)
+                    playable_bits |= 1 << kind
+                if self._discarded[kind]+1 == kind_count[kind]:
+                    critical.append(kind)
+                    critical_bits |= 1 << kind
+            if number > pile and self._discarded[kind] == kind_count[kind]:
+                blocked = True
+        kinds = COLOR_KINDS[color_index]
+        # these sets are never modified, only replaced: undo and snapshots share them
+        self.playable = (self.playable - kinds).union(playable)
+        self.dead = (self.dead - kinds).union(dead)
+        self.critical = (self.critical - kinds).union(critical)
+        keep = ~COLOR_MASKS[color_index]
+        self.playable_mask = (self.playable_mask & keep) | playable_bits
+        self.dead_mask = (self.dead_mask & keep) | dead_bits
+        self.critical_mask = (self.critical_mask & keep) | critical_bits
+
+    @property
+    def _derived(self):
+        "The derived sets and masks, for undo and snapshots."
+        return (self.playable, self.dead, self.critical,
+                self.playable_mask, self.dead_mask, self.critical_mask)
+
+    @_derived.setter
+    def _derived(self, derived):
+        (self.playable, self.dead, self.critical,
+         self.playable_mask, self.dead_mask, self.critical_mask) = derived
+
+    def compute_hash(self):
+        """The Zobrist hash of the current state, computed from scratch
+        (self.hash is the same, updated incrementally)."""
+        h = (zobrist.POSITION[self.deck.position] ^ zobrist.SEAT[self.seat]
+             ^ zobrist.BLUE_COINS[self.blue_coins] ^ zobrist.RED_COINS[self.red_coins])
+        for color_index, color in enumerate(COLORS):
+            h ^= zobrist.PILES[color_index*6 + self.piles[color]]
+        for seat, hand in enumerate(self._hands):
+            h ^= zobrist.hand_key(seat, 0, hand.cards)
+        return h
+
+    def _pop_card(self, icard):
+        "Pop a card from current hand (it draws a new one), and update the counters and hash."
+        hand = self.current_hand
+        position = self.deck.position
+        before = hand.cards[:]
+        card = hand.pop(icard)
+        self.hash ^= (zobrist.hand_key(self.seat, icard-1, before)
+                      ^ zobrist.hand_key(self.seat, icard-1, hand.cards))
+        counts = self._in_hands[self.seat]._items
+        counts[card.kind] -= 1
+        if self.deck.position != position:
+            new = hand.cards[-1]
+            counts[new.kind] += 1
+            self._in_deck[new.kind] -= 1
+            self.hash ^= zobrist.POSITION[position] ^ zobrist.POSITION[self.deck.position]
+            if self.deck.position == len(self.deck._cards):  # everybody plays once more
+                self.end_turn = self.turns + 1 + len(self._players)
+        return card
+
     def turn(self, _choice=None):
         """
         Play one round: ask the player what she wants to do, then update the game.
@@ -255,72 +715,339 @@ class Game:
           If provided, _choice can be:
            - None: the human will be prompted
            - a (str), which is played
+           - an Action object (Play, Discard or Clue), which is applied without parsing
            - an AI object (we will play what its function play() suggests)
            - a list of actions, because I chose to
              record invalid actions too (and these loop within this file).
         """
-        self.log()
-        self.log(self.current_player_name,
-                 "this is what you remember:",
-                 self.current_hand.str_clue(),
-                 #               self.current_hand,
-                 "\n      this is what you see:")
-        for player, hand in zip(self.players[1:], self.hands[1:]):
-            self.log("%32s"%player, hand)
-            self.log(" "*32, hand.str_clue())
-
-        self.log("""What do you want to play?
-        (d)iscard a card (12345)
-        give a (c)lue (RBGWY 12345)
-        (p)lay a card (12345)
-        e(x)amine the piles""")
-
-        # ai.Cheater(self).play()
+        if not self.quiet:
+            self.log_table()
 
         while True:
             if _choice is None:
+                import readline  # this greatly improves `input` (only needed by humans)
                 choice = input("hanabi> ")
                 if choice.strip() == '':
                     continue
-            elif isinstance(_choice, ai.AI):
-                # fixme: duck-typing seems more natural to students, as in
-                #     try: _choice.play() except AttributeError ...
-                choice = _choice.play()
-            elif isinstance(_choice, str):
+            elif isinstance(_choice, (str, Action)):
                 choice = _choice
+            elif hasattr(_choice, 'play'):  # an AI (duck-typing: no need to import hanabi.ai)
+                choice = _choice.play()
             else:  # assume it is a list
                 choice = _choice.pop(0)
                 self.log('hanabi (auto)>', choice)
-            # so here, choice is a 2 or 3 letters code:
+            # so here, choice is an Action, or a 2 or 3 letters code:
             #  d2 (discard 2nd card)
             #  cR (give Red clue) ... will become cRA (give Red to Alice)
             #  p5 (play 5th card)
 
             self.moves.append(choice)
             try:
-                self.actions[choice[0]](choice[1:])
+                if isinstance(choice, Action):
+                    self.apply(choice)
+                else:
+                    self.actions[choice[0]](choice[1:])
                 return
             except KeyError as e:
                 self.log(e, "is not a valid action. Try again.")
             except (ValueError, IndexError) as e:
                 self.log(e, "Try again")
 
+    def log_table(self):
+        "Show the current player what she remembers and what she sees."
+        self.log()
+        self.log(self.current_player_name,
+                 "this is what you remember:",
+                 self.current_hand.str_clue(),
+                 #               self.current_hand,
+                 "\n      this is what you see:")
+        for player, hand in zip(self.players[1:], self.hands[1:]):
+            self.log("%32s"%player, hand)
+            self.log(" "*32, hand.str_clue())
+
+        self.log("""What do you want to play?
+        (d)iscard a card (12345)
+        give a (c)lue (RBGWY 12345)
+        (p)lay a card (12345)
+        e(x)amine the piles""")
+
+    def apply(self, action):
+        """Apply a structured action (Play, Discard or Clue), without any parsing.
+
+        Return an undo token, for undo(). If the action ends the game
+        (StopIteration, 3 red coins), the token is the exception's undo_token.
+        """
+        token = (action, self.seat, self.turns, self.blue_coins, self.red_coins,
+                 self.deck.position, self._derived, self.hash)
+        try:
+            if isinstance(action, Play):
+                card = self.current_hand.cards[action.index-1:action.index]
+                self.play_card(action.index)
+            elif isinstance(action, Discard):
+                card = self.current_hand.cards[action.index-1:action.index]
+                self.discard_card(action.index)
+            elif isinstance(action, Clue):
+                card = [(c, c.mask) for c in self.hands[action.target].cards]
+                self.give_clue(action.hint, action.target)
+            else:
+                raise ValueError("%r is not a valid action."%(action,))
+        except StopIteration as e:
+            e.undo_token = token + (card,)
+            raise
+        return token + (card,)
+
+    def undo(self, token):
+        """Undo the last applied action, given its token (see apply).
+        Tokens must be undone in reverse order."""
+        (action, seat, turns, blue_coins, red_coins, position,
+         derived, self.hash, card) = token
+        self.seat, self.turns = seat, turns
+        self.blue_coins, self.red_coins = blue_coins, red_coins
+        self._derived = derived
+        if position < len(self.deck._cards):
+            self.end_turn = None
+        self._ended = False
+        del self.history[-1]
+        if isinstance(action, Clue):
+            for (c, mask) in card:
+                c.mask = mask
+            return
+
+        card = card[0]
+        cards = self._hands[seat].cards
+        counts = self._in_hands[seat]._items
+        i = action.index-1
+        if self.deck.position != position:  # a card was drawn, it goes back to the deck
+            new = cards[-1]
+            counts[new.kind] -= 1
+            self._in_deck[new.kind] += 1
+            self.deck.position = position
+            for j in range(len(cards)-1, i, -1):
+                cards[j] = cards[j-1]
+            cards[i] = card
+        else:
+            cards.insert(i, card)
+        counts[card.kind] += 1
+        pile = self.discard_pile.cards
+        if pile and pile[-1] is card:  # discarded or misplayed
+            pile.pop()
+            self._discarded[card.kind] -= 1
+        else:
+            self.piles[card.color] -= 1
+            self._played[card.kind] = 0
+
+    def snapshot(self):
+        """The state of the game, as a compact State (a tuple).
+        restore() brings the game back to it."""
+        return State(self.deck.position, self.seat, self.turns,
+                     self.blue_coins, self.red_coins,
+                     tuple(self.piles.values()),
+                     tuple([tuple(hand.cards) for hand in self._hands]),
+                     tuple([c.mask for c in self.deck._cards]),
+                     tuple(self.discard_pile.cards), bytes(self.history), tuple(self.moves),
+                     tuple(self._discarded), tuple(self._played), tuple(self._in_deck),
+                     tuple([tuple(counts._items) for counts in self._in_hands]),
+                     self._derived, self.hash, self.end_turn)
+
+    def restore(self, state):
+        "Restore a state given by snapshot() (of this game), earlier or later."
+        for card, mask in zip(self.deck._cards, state.clues):
+            card.mask = mask
+        self.deck.position = state.position
+        self.seat, self.turns = state.seat, state.turns
+        self.blue_coins, self.red_coins = state.blue_coins, state.red_coins
+        for color, pile in zip(COLORS, state.piles):
+            self.piles[color] = pile
+        for hand, cards in zip(self._hands, state.hands):
+            hand.cards[:] = cards
+        self.discard_pile.cards[:] = state.discard_pile
+        self.history[:] = state.history
+        self.moves[:] = state.moves
+        self._discarded[:] = state.discarded
+        self._played[:] = state.played
+        self._in_deck[:] = state.in_deck
+        for counts, saved in zip(self._in_hands, state.in_hands):
+            counts._items[:] = saved
+        self._derived = state.sets
+        self.hash = state.hash
+        self.end_turn = state.end_turn
+        self._ended = False
+
+    def to_bytes(self):
+        """The state of the game, in a fixed layout of STATE_LAYOUT.size bytes
+        (see STATE_LAYOUT): deck, hands, clues, piles, coins and turns.
+
+        The names of the players, the seed, the history, the order of the
+        discard pile and the clues of the cards out of the hands are not
+        part of it: equal states are equal bytes,
+        which may be hashed, deduplicated, or sent to another process.
+        """
+        cards = self.deck._cards
+        index = {id(card): i for (i, card) in enumerate(cards)}
+        size = Deck.cards_by_player[len(self._players)]
+        slots, clues = [], []
+        for hand in self._hands:  # size slots per hand, empty ones at the end
+            for card in hand.cards:
+                slots.append(index[id(card)])
+                clues.append(mask_code(card.mask))
+            free = size - len(hand.cards)
+            slots += [NO_CARD]*free
+            clues += [0]*free
+        free = 20 - len(slots)
+        return STATE_LAYOUT.pack(
+            STATE_VERSION, len(self._players), self.seat, self.turns,
+            self.blue_coins, self.red_coins, self.deck.position,
+            NO_CARD if self.end_turn is None else self.end_turn,
+            *[self.piles[color] for color in COLORS],
+            self.deck.to_bytes(), *(slots + [NO_CARD]*free), *(clues + [0]*free))
+
+    @classmethod
+    def from_bytes(cls, data):
+        "A new game (headless) in the state given by to_bytes(), with the default players."
+        if len(data) != STATE_LAYOUT.size or data[0] != STATE_VERSION:
+            raise ValueError("Not a game state of version %d."%STATE_VERSION)
+        fields = STATE_LAYOUT.unpack(data)
+        (_, nplayers, seat, turns, blue_coins, red_coins, position, end_turn) = fields[:8]
+        piles, deck = fields[8:13], fields[13]
+        slots, clues = fields[14:34], fields[34:]
+
+        game = cls(nplayers, cards=Deck.from_bytes(deck).cards)
+        game.headless = True
+        cards = game.deck._cards
+        game.deck.position = position
+        size = Deck.cards_by_player[nplayers]
+        in_hands = set()
+        for seat_index, hand in enumerate(game._hands):
+            hand.cards[:] = [cards[i] for i in slots[seat_index*size:(seat_index+1)*size]
+                             if i != NO_CARD]
+            in_hands.update(slots[seat_index*size:(seat_index+1)*size])
+        for i, code in zip(slots, clues):
+            if i != NO_CARD:
+                cards[i].mask = code_mask(code)
+        for color, pile in zip(COLORS, piles):
+            game.piles[color] = pile
+        # drawn cards out of the hands: the first of each kind on a pile is played
+        played = set()
+        for i in range(position):
+            card = cards[i]
+            if i in in_hands:
+                continue
+            if card.number <= game.piles[card.color] and card.kind not in played:
+                played.add(card.kind)
+            else:
+                game.discard_pile.append(card)
+        game.seat, game.turns = seat, turns
+        game.blue_coins, game.red_coins = blue_coins, red_coins
+        game.end_turn = None if end_turn == NO_CARD else end_turn
+        game._started = turns > 0
+
+        game._reset_counts()
+        for kind in played:
+            game._played[kind] = 1
+        for card in game.discard_pile.cards:
+            game._discarded[card.kind] += 1
+        game._in_deck[:] = [0]*len(CARD_KINDS)
+        for card in cards[position:]:
+            game._in_deck[card.kind] += 1
+        for color_index in range(len(COLORS)):
+            game._update_color(color_index)
+        game.hash = game.compute_hash()
+        return game
+
+    def apply_code(self, code):
+        "Apply an action given by its byte code (see hanabi.action.encode)."
+        if code == LOST_COIN:
+            self.remove_blue_coin()
+            self.history.append(code)
+        else:
+            self.apply(decode(code))
+
     def add_blue_coin(self):
         if self.blue_coins == 8:
             raise ValueError("Already 8 blue coins. Can't get an extra one.")
+        self.hash ^= zobrist.BLUE_COINS[self.blue_coins] ^ zobrist.BLUE_COINS[self.blue_coins+1]
         self.blue_coins += 1
 
     def remove_blue_coin(self):
         if self.blue_coins == 0:
             raise ValueError("No blue coin left.")
+        self.hash ^= zobrist.BLUE_COINS[self.blue_coins] ^ zobrist.BLUE_COINS[self.blue_coins-1]
         self.blue_coins -= 1
 
     def add_red_coin(self):
-        self.red_coins += 1
-        if self.red_coins == 3:
+        if self._add_red_coin():
             # StopIteration will stop the main loop!
             raise StopIteration()
 
+    def _add_red_coin(self):
+        "Add a red coin, and return whether it is the 3rd one."
+        self.hash ^= zobrist.RED_COINS[self.red_coins] ^ zobrist.RED_COINS[self.red_coins+1]
+        self.red_coins += 1
+        return self.red_coins == 3
+
+    @property
+    def over(self):
+        "Whether the game is over: 3 red coins, 25 points, or the last turns after the deck are played."
+        return (self.red_coins >= 3 or self.score == 25
+                or (self.end_turn is not None and self.turns >= self.end_turn))
+
+    def is_legal(self, action):
+        "Whether an Action is valid now (no exception, nothing changes)."
+        if self.over:
+            return False
+        if isinstance(action, Play):
+            return 1 <= action.index <= len(self.current_hand.cards)
+        if isinstance(action, Discard):
+            return self.blue_coins < 8 and 1 <= action.index <= len(self.current_hand.cards)
+        if isinstance(action, Clue):
+            touched = HINT_MASKS.get(action.hint)
+            if not (self.blue_coins > 0 and touched and 1 <= action.target < len(self._players)):
+                return False
+            return any(1 << card.kind & touched for card in self.hands[action.target].cards)
+        return False
+
+    def legal_mask(self):
+        """The legal moves, as a bitmask of their byte codes (see hanabi.action.encode):
+        bit code is set if the action of this code is valid."""
+        if self.over:
+            return 0
+        slots = (1 << len(self.current_hand.cards)) - 1
+        mask = slots
+        if self.blue_coins < 8:
+            mask |= slots << 5
+        if self.blue_coins > 0:
+            for target in range(1, len(self._players)):
+                kinds = 0
+                for card in self.hands[target].cards:
+                    kinds |= 1 << card.kind
+                base = 10 + (target-1)*10
+                for i, hint in enumerate(HINTS):
+                    if kinds & HINT_MASKS[hint]:
+                        mask |= 1 << (base + i)
+        return mask
+
+    def legal_actions(self):
+        "The list of the legal moves (Actions)."
+        mask = self.legal_mask()
+        return [decode(code) for code in range(50) if mask >> code & 1]
+
+    def step(self, action):
+        """Fast path: apply an Action if it is legal, without raising exceptions.
+
+        Return INVALID if it is not legal (nothing changes),
+        GAME_OVER if the game is over after it, else VALID (see hanabi.action).
+        """
+        if not self.is_legal(action):
+            return INVALID
+        if isinstance(action, Play):
+            self._play_card(action.index)
+        elif isinstance(action, Discard):
+            self._discard_card(action.index)
+        else:
+            self.remove_blue_coin()
+            self._give_clue(action.hint, action.target)
+        return GAME_OVER if self.over else VALID
+
 
     def discard(self, index):
         "Action: discard the given card from current hand (the first if index is an empty string)."
@@ -329,43 +1056,79 @@ class Game:
                 index = "1"
         except Exception:
             pass
-        icard = int(index)
+        self.discard_card(int(index))
+
+    def discard_card(self, icard):
+        "Discard the card at (1-based) index icard from current hand."
+        if self.blue_coins == 8:
+            raise ValueError("Already 8 blue coins. Can't get an extra one.")
+        if not 1 <= icard <= len(self.current_hand.cards):
+            raise ValueError("%d is not a valid card index."%icard)
+        self._discard_card(icard)
+
+    def _discard_card(self, icard):
+        "Discard, the move being valid."
         self.add_blue_coin()
-        try:
-            card = self.current_hand.pop(icard)
-        except ValueError:
-            self.remove_blue_coin()
-            raise
+        position = self.deck.position
+        card = self._pop_card(icard)
+        self.history.append(5 + icard-1)
         self.discard_pile.append(card)
-        self.discard_pile.sort()
-        self.log(self.current_player_name, "discards", card.str_color(),
-               "and now we have %d blue coins."%self.blue_coins)
+        self._discarded[card.kind] += 1
+        self._update_color(card.kind // 5)
+        if self.observers:
+            self._emit(Discarded(self.seat, icard, card, 5 + icard-1, self.blue_coins))
+            self._emit_draw(position)
         self.next_player()
 
     def play(self, index):
         "Action: play the given card."
-        icard = int(index)
-        card = self.current_hand.pop(icard)
-        self.log(self.current_player_name, "tries to play", card, "... ", end="")
+        self.play_card(int(index))
+
+    def play_card(self, icard):
+        "Play the card at (1-based) index icard from current hand."
+        if self._play_card(icard):
+            raise StopIteration()
+
+    def _play_card(self, icard):
+        "Play, and return whether it was the 3rd misplay (then it is still the same player's turn)."
+        position = self.deck.position
+        card = self._pop_card(icard)
+        self.history.append(icard-1)
 
         if (self.piles[card.color]+1 == card.number):
+            pile = card.kind//5*6 + self.piles[card.color]
+            self.hash ^= zobrist.PILES[pile] ^ zobrist.PILES[pile+1]
             self.piles[card.color] += 1
-            self.log("successfully!")
-            self.log(card.color.colorize(
-                ascii_art.fireworks[self.piles[card.color]]))
+            self._played[card.kind] = 1
+            self._update_color(card.kind // 5)
             if self.piles[card.color] == 5:
                 try:
                     self.add_blue_coin()
                 except ValueError:  # it is valid to play a 5 when we have 8 coins. It is simply lost
                     pass
+            if self.observers:
+                self._emit(Played(self.seat, icard, card, icard-1))
         else:
             # misplay!
             self.discard_pile.append(card)
-            self.log("That was a bad idea!")
-            self.log(ascii_art.kaboom)
-            self.add_red_coin()
-        self.print_piles()
+            self._discarded[card.kind] += 1
+            self._update_color(card.kind // 5)
+            lost = self._add_red_coin()
+            if self.observers:
+                self._emit(Misplayed(self.seat, icard, card, icard-1, self.red_coins))
+                if lost:
+                    self._end()
+            if lost:
+                return True
+        if self.observers:
+            self._emit_draw(position)
         self.next_player()
+        return False
+
+    def _emit_draw(self, position):
+        "Send draw, if the current player drew a card (the deck was at position before)."
+        if self.deck.position != position:
+            self._emit(Drew(self.seat, self.current_hand.cards[-1], len(self.deck)))
 
     def clue(self, clue):
         """Action: give a clue.
@@ -386,48 +1149,80 @@ class Game:
             raise ValueError("%s is not a valid clue."%hint)
         self.remove_blue_coin()  # will raise if no blue coin left
 
+        # note: the blue coin is lost if the target is invalid, replays rely on it
         try:
-            target_index = clue[1]
-            if target_index in 'ABCDE':
-                short_names = [name[0] for name in self.players]
-                target_index = short_names.index(target_index)
-        except IndexError:
-            target_index = 1
-        target_index = int(target_index)
+            try:
+                target_index = clue[1]
+                if target_index in 'ABCDE':
+                    short_names = [name[0] for name in self.players]
+                    target_index = short_names.index(target_index)
+            except IndexError:
+                target_index = 1
+            target_index = int(target_index)
+        except ValueError:
+            self.history.append(LOST_COIN)
+            raise
+        if target_index >= len(self._players):
+            self.history.append(LOST_COIN)
+            raise IndexError("There is no player %d."%target_index)
+
+        self.add_blue_coin()  # give_clue takes it again
+        self.give_clue(hint, target_index)
+
+    def give_clue(self, hint, target_index=1):
+        """Give the clue hint (within 12345RBGWY) to player target_index
+        (relative to the current player, 1 is the next one)."""
         if target_index == 0:
-            self.add_blue_coin()  # put back the blue coin
             raise ValueError("Cannot give a clue to yourself.")
+        if not 1 <= target_index < len(self._players):
+            raise IndexError("There is no player %d."%target_index)
+        self.remove_blue_coin()  # will raise if no blue coin left
+        cards = self.hands[target_index].cards
 
-        target_name = self.players[target_index]
-
-        self.log(self.current_player_name, "gives a clue", hint, "to", target_name)
-        #  player = clue[1]  # if >=3 players
-        targetted_card = False
-        for card in self.hands[target_index].cards:
-            if hint in str(card):
-                targetted_card = True
-                if hint in "12345":
-                    card.number_clue = hint
-                else:
-                    card.color_clue = hint
-        if not targetted_card:
+        if not any(1 << card.kind & HINT_MASKS[hint] for card in cards):
             self.add_blue_coin()  # put back the blue coin
             raise ValueError("This clue is not valid (it matches no card in the target hand)")
+        self._give_clue(hint, target_index)
+
+    def _give_clue(self, hint, target_index):
+        "Give a valid clue (its blue coin is already spent)."
+        target_seat = (self.seat + target_index) % len(self._players)
+        cards = self._hands[target_seat].cards
+        touched = HINT_MASKS[hint]
+        # touched cards are of the hint, the others are not
+        for slot, card in enumerate(cards):
+            if 1 << card.kind & touched:
+                mask = card.mask & touched
+            else:
+                mask = card.mask & ~touched
+            if mask != card.mask:
+                self.hash ^= zobrist.card_key(target_seat, slot, card)
+                card.mask = mask
+                self.hash ^= zobrist.card_key(target_seat, slot, card)
+        code = 10 + (target_index-1)*10 + HINT_INDEX[hint]
+        self.history.append(code)
+        if self.observers:
+            slots = [slot+1 for slot, card in enumerate(cards) if 1 << card.kind & touched]
+            self._emit(Clued(self.seat, target_seat, hint, slots, code))
         self.next_player()
 
     def examine_piles(self, *unused):
         "Action: look at the table."
         self.print_piles()
 
+    def _str_discard_pile(self):
+        "The discard pile, sorted (the pile itself is kept in discard order)."
+        return " ".join([c.str_color() for c in sorted(self.discard_pile.cards, key=str)])
+
     def _bw_print_piles(self):
-        self.log("    Discard:", self.discard_pile)
+        self.log("    Discard:", self._str_discard_pile())
         for c in list(Color):
             self.log("%6s"%c, "pile:", self.piles[c])
         self.log("     Coins:", self.blue_coins, "blue,", self.red_coins, "red")
 
     def _color_print_piles(self):
-        self.log("       Deck:", len(self.deck.cards))
-        self.log("    Discard:", self.discard_pile)
+        self.log("       Deck:", len(self.deck))
+        self.log("    Discard:", self._str_discard_pile())
         for c in list(Color):
             self.log(c.colorize("%6s"%c, "pile:", self.piles[c]))
         self.log("     Coins:", self.blue_coins, "blue,", self.red_coins, "red")
@@ -438,23 +1233,25 @@ class Game:
     def next_player(self):
         """Switch to next player.
 
-        Player 0 is *always* the current_player.
+        Player 0 is *always* the current_player: players and hands
+        are not rotated, only the seat counter moves.
         """
+        self.turns += 1
+        self.hash ^= zobrist.SEAT[self.seat]
+        self.seat += 1
+        if self.seat == len(self._players):
+            self.seat = 0
+        self.hash ^= zobrist.SEAT[self.seat]
+        if self.observers and self.over:
+            self._end()
 
-        if self.current_player is None:   # called at game setup
-            # I keep these two constants for the moment:
-            self.current_player = 0
-            self.other_player = 1
-        else:
-            # rotate players and hands
-            self.hands.append(self.hands.pop(0))
-            self.players.append(self.players.pop(0))
-
-        self.current_player_name = '\033[1m%s\033[0m'%self.players[self.current_player]
-        self.current_hand = self.hands[self.current_player]
+    @property
+    def current_hand(self):
+        return self._hands[self.seat]
 
-        # other nice ideas: https://stackoverflow.com/questions/23416381/circular-list-iterator-in-python
-        # itertools.cycle or players.append(pop(0))
+    @property
+    def current_player_name(self):
+        return '\033[1m%s\033[0m'%self._players[self.seat]
 
     def command(self, args):
         "Action: Run a python command from Hanabi (yes, it is a cheat code: self is the current Game)."
@@ -472,10 +1269,12 @@ class Game:
         return sum(self.piles.values())
 
     def run(self):
+        if self.observers and not self._started:
+            self._start()
         try:
             last_players = list(self.players)
             while last_players:
-                if len(self.deck.cards) == 0:
+                if len(self.deck) == 0:
                     self.log()
                     self.log("--> Last turns:",
                              " ".join(last_players),
@@ -491,46 +1290,59 @@ class Game:
         except (KeyboardInterrupt, EOFError, StopIteration) as e:
             self.log('Game finished because of', e)
             pass
-        self.save('autosave.py')
+        if self.observers:
+            self._end(None if self.over else INTERRUPTED)
+        if self.headless:
+            return
+        self.save('autosave.hnb')
 
         self.log("\nOne final glance at the table:")
         self.log(self.starting_deck)
         self.print_piles()
         print("\nGoodbye. Your score is %d"%self.score)
 
+    @property
+    def starting_deck(self):
+        "The deck, as it was before dealing."
+        return Deck(list(self.deck._cards))
+
     def save(self, filename):
-        """Save starting deck and list of moves."""
-        f = open(filename, 'w')
-        f.write("""
-players = %r
-cards = %r
-moves = %r
-"""%(self.players,
-     self.starting_deck,
-     self.moves))
-        # fixme: seems that a deck's repr is its list of cards?
+        """Save the game as a binary replay (see hanabi.replay)."""
+        from . import replay
+        f = open(filename, 'wb')
+        replay.ReplayWriter(f).write(replay.Replay.from_game(self))
         f.close()
 
     def load(self, filename):
         """Load a saved game, replay the moves.
 
-        A saved game consists of the variables players, cards and moves.
+        A saved game is either a binary replay (the first one of the file is loaded),
+        or an old python replay, which consists of the variables players, cards (or seed) and moves.
+        Nothing is executed: old replays are parsed, and their cheat-code moves are ignored.
         """
-        f = open(filename)
-        # in python3, it is tricky to modify a variable with exec:
-        #   https://stackoverflow.com/questions/15086040/behavior-of-exec-function-in-python-2-and-python-3
-        # need globals for the Card and Color definitions, and loaded-dict for returned values
-        loaded = {}
-        for l in f:
-            exec(l, globals(), loaded)
-
+        from . import replay
+        if replay.is_replay_file(filename):
+            f = open(filename, 'rb')
+            saved = next(replay.ReplayReader(f))
+            f.close()
+            self.log('Loaded:', saved)
+            if saved.seed is not None:
+                self.reset(saved.players, seed=saved.seed)
+            else:
+                self.reset(saved.players, cards=Deck.from_bytes(saved.deck).cards)
+            for code in saved.moves:
+                self.apply_code(code)
+            return
+
+        loaded = replay.read_legacy(filename)
         self.log('Loaded:', loaded)
         multi = False
         players = list(loaded['players'])
-        cards = loaded['cards']
-        moves = loaded['moves']
+        cards = loaded.get('cards')
+        seed = loaded.get('seed')
+        moves = [m for m in loaded['moves'] if not m.startswith('>')]
 
-        self.reset(players, multi, cards)
+        self.reset(players, multi, cards, seed)
         # for m in moves:
         #     self.turn(m)
         # was simpler, but infinity-looped when user made a mistake
@@ -0,0 +1,165 @@
+"""
+Adaptive-stopping evaluation of AIs: play just as many games as needed.
+
+estimate() plays batches of games until the confidence interval of the
+mean score is narrower than the requested precision. compare() plays two
+AIs on the same decks (and the same random seeds), and stops as soon as
+the confidence interval of the mean difference excludes 0 (one AI is
+better), or is within +-margin (they are equivalent).
+
+compare() looks at the data after every batch: to keep the error rate
+of the whole test below 1 - confidence, each look uses the confidence
+level of a Bonferroni correction over the planned number of looks
+(max_games / batch).
+
+    >>> import hanabi.evaluate
+    >>> hanabi.evaluate.estimate('Cheater', players=2, precision=0.02)
+    >>> hanabi.evaluate.compare('Cheater', 'MCTS', players=3)
+
+or from the command line:
+
+    hanabi --ai Cheater --precision 0.02 [--versus OtherAI]
+
+.. autosummary::
+   Estimate
+   Comparison
+   Differences
+   estimate
+   compare
+"""
+
+import math
+from collections import namedtuple
+from statistics import NormalDist
+
+from . import tournament
+from .stats import Summary
+
+
+Estimate = namedtuple('Estimate', 'mean half_width games summary')
+Estimate.__doc__ = """Mean score of an AI, within +-half_width at the requested confidence,
+measured on this number of games (summary is their hanabi.stats.Summary)."""
+
+Comparison = namedtuple('Comparison', 'difference half_width games verdict')
+Comparison.__doc__ = """Mean score difference (first AI - second AI) on shared decks, within
++-half_width. verdict is BETTER, WORSE, EQUIVALENT or UNDECIDED (max_games reached)."""
+
+BETTER = 'better'
+WORSE = 'worse'
+EQUIVALENT = 'equivalent'
+UNDECIDED = 'undecided'
+
+
+def z_value(confidence):
+    "Half-width of the two-sided confidence interval of a standard normal variable."
+    return NormalDist().inv_cdf((1 + confidence) / 2)
+
+
+class Differences:
+    "Paired score differences, summarized with exact integer sums (merge with +=)."
+
+    def __init__(self):
+        self.count = self.total = self.squares = 0
+
+    def add(self, difference):
+        self.count += 1
+        self.total += difference
+        self.squares += difference*difference
+
+    def __iadd__(self, other):
+        self.count += other.count
+        self.total += other.total
+        self.squares += other.squares
+        return self
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0
+
+    @property
+    def variance(self):
+        "Sample variance (0 with less than 2 differences)."
+        n = self.count
+        if n < 2:
+            return 0
+        return (n*self.squares - self.total*self.total) / (n*(n-1))
+
+
+def _half_width(variance, count, z):
+    return z * math.sqrt(variance / count) if count else math.inf
+
+
+def estimate(ai_name='Cheater', players=2, precision=0.05, confidence=0.95,
+             batch=500, max_games=10**6, first_seed=0, jobs=None, pool=None):
+    """Play batches of games (consecutive seeds from first_seed), until the
+    confidence interval of the mean score is within +-precision, or max_games."""
+    z = z_value(confidence)
+    summary = Summary()
+    seed = first_seed
+    # at least 2 batches: with one, a lucky batch could stop too early
+    while summary.count < max_games:
+        n = min(batch, max_games - summary.count)
+        summary.merge(tournament.summarize(ai_name, players, range(seed, seed+n), jobs,
+                                           pool=pool))
+        seed += n
+        if summary.count >= 2*batch and _half_width(summary.variance, summary.count, z) <= precision:
+            break
+    return Estimate(summary.mean, _half_width(summary.variance, summary.count, z),
+                    summary.count, summary)
+
+
+def _scores(ai_name, players, seeds, jobs, pool):
+    return {r.seed: r.score for r in tournament.run(ai_name, players, seeds, jobs,
+                                                    keep_lost=False, pool=pool)}
+
+
+def compare(ai_a, ai_b, players=2, margin=0.1, confidence=0.95,
+            batch=500, max_games=20000, first_seed=0, jobs=None, pool=None):
+    """Paired sequential comparison of two AIs on shared decks.
+
+    Stop as soon as the confidence interval of the mean difference (ai_a - ai_b)
+    excludes 0, or lies within +-margin, and return a Comparison.
+    """
+    looks = max(1, math.ceil(max_games / batch))
+    z = z_value(1 - (1-confidence) / looks)
+    differences = Differences()
+    seed = first_seed
+    verdict = UNDECIDED
+    while differences.count < max_games:
+        seeds = range(seed, seed + min(batch, max_games - differences.count))
+        a = _scores(ai_a, players, seeds, jobs, pool)
+        b = _scores(ai_b, players, seeds, jobs, pool)
+        for s in seeds:
+            differences.add(a[s] - b[s])
+        seed = seeds.stop
+        if differences.count < 2:
+            continue
+        mean = differences.mean
+        half = _half_width(differences.variance, differences.count, z)
+        if mean - half > 0:
+            verdict = BETTER
+        elif mean + half < 0:
+            verdict = WORSE
+        elif -margin <= mean - half and mean + half <= margin:
+            verdict = EQUIVALENT
+        else:
+            continue
+        break
+    return Comparison(differences.mean, _half_width(differences.variance, differences.count, z),
+                      differences.count, verdict)
+
+
+def cli(ai_name, players, precision, versus=None, jobs=None, first_seed=0, pool=None):
+    "Estimate an AI (or compare it with versus), and print the result."
+    if versus is None:
+        result = estimate(ai_name, players, precision, first_seed=first_seed, jobs=jobs,
+                          pool=pool)
+        print("AI %s, %d players: %.3f +- %.3f (95%%), %d games"%(
+            ai_name, players, result.mean, result.half_width, result.games))
+        print(result.summary)
+    else:
+        result = compare(ai_name, versus, players, margin=precision, first_seed=first_seed,
+                         jobs=jobs, pool=pool)
+        print("AI %s - AI %s, %d players: %+.3f +- %.3f (95%%), %d games: %s"%(
+            ai_name, versus, players, result.difference, result.half_width, result.games,
+            result.verdict))
@@ -0,0 +1,149 @@
+"""
+Events of a game, and observers which receive them.
+
+A Game reports what happens as typed events, to the observers subscribed
+with Game.subscribe(). With no observer, no event is built: the engine
+only checks that its observer list is empty.
+
+    >>> stats = hanabi.events.StatsCollector()
+    >>> game.subscribe(stats)
+    >>> game.run()
+    >>> print(stats.summary)
+
+The text output of a game (when it is not quiet) is the TextLog observer,
+and hanabi.replay.ReplayRecorder writes replays of the observed games.
+An observer is an object with a notify(event) method; Observer dispatches
+each event to its on_<kind> method.
+
+Events are sent after the state is updated: the game may be looked at
+from the observer. game_start is sent before the first move (or when
+Game.run() starts), game_end when the game is over. Game.undo() and
+Game.restore() send no event.
+
+.. autosummary::
+   Observer
+   TextLog
+   StatsCollector
+"""
+
+from collections import namedtuple
+
+from .stats import Summary
+
+# why a game ended
+PERFECT = 'perfect'
+RED_COINS = 'red coins'
+DECK_EXHAUSTED = 'deck exhausted'
+INTERRUPTED = 'interrupted'
+
+
+def _event(name, kind, fields, doc):
+    cls = namedtuple(name, fields)
+    cls.__doc__ = doc
+    cls.kind = kind
+    cls.handler = 'on_' + kind
+    return cls
+
+
+GameStart = _event('GameStart', 'game_start', 'players seed deck ai',
+                   """The game starts: players are their names, deck the bytes of the
+                   starting deck (see Deck.to_bytes), ai the name of the AI class ('' if none).""")
+Played = _event('Played', 'play', 'seat slot card code',
+                "The player at seat played card from slot (1-based), successfully.")
+Misplayed = _event('Misplayed', 'misplay', 'seat slot card code red_coins',
+                   "The player at seat played card from slot, which was not playable.")
+Discarded = _event('Discarded', 'discard', 'seat slot card code blue_coins',
+                   "The player at seat discarded card from slot.")
+Clued = _event('Clued', 'clue', 'seat target hint slots code',
+               """The player at seat gave the clue hint (within 12345RBGWY) to the
+               player at seat target, touching these slots (1-based) of its hand.""")
+Drew = _event('Drew', 'draw', 'seat card deck_size',
+              "The player at seat drew card, deck_size cards are left.")
+GameEnd = _event('GameEnd', 'game_end', 'score turns reason',
+                 "The game is over, reason is PERFECT, RED_COINS, DECK_EXHAUSTED or INTERRUPTED.")
+
+EVENTS = (GameStart, Played, Misplayed, Discarded, Clued, Drew, GameEnd)
+
+
+class Observer:
+    "Base class of observers: override the on_<kind> methods of the events of interest."
+
+    def notify(self, event):
+        getattr(self, event.handler)(event)
+
+    def on_game_start(self, event):
+        pass
+
+    def on_play(self, event):
+        pass
+
+    def on_misplay(self, event):
+        pass
+
+    def on_discard(self, event):
+        pass
+
+    def on_clue(self, event):
+        pass
+
+    def on_draw(self, event):
+        pass
+
+    def on_game_end(self, event):
+        pass
+
+
+class TextLog(Observer):
+    "The text output of a game: what the players do, with fireworks. See Game.quiet."
+
+    def __init__(self, game):
+        self.game = game
+
+    def _name(self, seat):
+        return '\033[1m%s\033[0m'%self.game._players[seat]
+
+    def on_play(self, event):
+        from . import ascii_art
+        game = self.game
+        print(self._name(event.seat), "tries to play", event.card, "... successfully!")
+        print(event.card.color.colorize(ascii_art.fireworks[game.piles[event.card.color]]))
+        game.print_piles()
+
+    def on_misplay(self, event):
+        from . import ascii_art
+        print(self._name(event.seat), "tries to play", event.card, "... That was a bad idea!")
+        print(ascii_art.kaboom)
+        if event.red_coins < 3:
+            self.game.print_piles()
+
+    def on_discard(self, event):
+        print(self._name(event.seat), "discards", event.card.str_color(),
+              "and now we have %d blue coins."%event.blue_coins)
+
+    def on_clue(self, event):
+        print(self._name(event.seat), "gives a clue", event.hint,
+              "to", self.game._players[event.target])
+
+
+class StatsCollector(Observer):
+    """Statistics of the observed games: a hanabi.stats.Summary of their scores,
+    end reasons and turns, and the number of each kind of move."""
+
+    def __init__(self, summary=None):
+        self.summary = Summary() if summary is None else summary
+        self.moves = {'play': 0, 'misplay': 0, 'discard': 0, 'clue': 0}
+
+    def on_play(self, event):
+        self.moves['play'] += 1
+
+    def on_misplay(self, event):
+        self.moves['misplay'] += 1
+
+    def on_discard(self, event):
+        self.moves['discard'] += 1
+
+    def on_clue(self, event):
+        self.moves['clue'] += 1
+
+    def on_game_end(self, event):
+        self.summary.add(event.score, event.turns, event.reason)
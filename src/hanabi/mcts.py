@@ -0,0 +1,328 @@
+"""
+Information-set Monte Carlo tree search, used by hanabi.ai.MCTS.
+
+The searching player does not see its own cards. Each iteration samples
+a world consistent with what it sees (other hands, piles, discard pile)
+and with the clues it received (a determinization), then walks down the
+tree with the moves legal in this world, expands one move, and finishes
+the game with a fast rule-based rollout. In the tree, the other players
+also play the rollout policy: only the searching player's moves are chosen.
+The tree is shared by all the sampled worlds, so its statistics average
+over what the player doesn't know.
+
+Worlds are played on Sim, a compact copy of the game (card kinds, plus
+what their owners know of them, as masks: see hanabi.deck.Card).
+Moves are action byte codes (see hanabi.action.encode).
+
+.. autosummary::
+   Observation
+   Sim
+   Node
+   search
+"""
+
+import math
+import random
+import time
+from collections import namedtuple
+
+from .deck import Deck, ALL_KINDS, COLOR_MASKS, NUMBER_MASKS
+
+KIND_COUNT = Deck.kind_count
+NKINDS = len(KIND_COUNT)
+# UCB exploration constant (scores are divided by 25), and bonus of the rollout policy's move:
+# the search leaves the policy only for moves which are clearly better
+EXPLORATION = 0.1
+PRIOR = 1
+# masks touched by the hints of clue codes (code-10) % 10, see hanabi.action.HINTS
+HINT_MASKS = NUMBER_MASKS + COLOR_MASKS
+# masks of a known color or number
+KNOWN_MASKS = COLOR_MASKS + NUMBER_MASKS
+
+
+Observation = namedtuple('Observation', 'seat hands masks unseen deck_size piles discarded '
+                         'blue_coins red_coins last_turns')
+Observation.__doc__ = """What the current player knows of a game (picklable, for process pools).
+
+hands are the kinds of the cards of each seat, None for the current player's own cards,
+and masks what their owners know of them. unseen counts the kinds the current player does
+not see (in its hand or in the deck), deck_size is the number of cards left in the deck,
+and last_turns the number of turns left once the deck is empty (-1 before).
+"""
+
+
+def observe(view):
+    "The Observation of the player of view (a hanabi.view.PlayerView): nothing it doesn't see."
+    seat, nplayers = view.seat, len(view.players)
+    hands, masks = [None]*nplayers, [None]*nplayers
+    hands[seat], masks[seat] = [None]*len(view.hand), view.hand.masks
+    for offset, hand in enumerate(view.other_hands, 1):
+        s = (seat+offset) % nplayers
+        hands[s] = [card.kind for card in hand]
+        masks[s] = [card.mask for card in hand]
+    piles = list(view.piles.values())
+
+    unseen = list(KIND_COUNT)
+    for kind in range(NKINDS):
+        unseen[kind] -= view.discarded[kind]
+    for color, pile in enumerate(piles):
+        for number in range(pile):
+            unseen[color*5 + number] -= 1
+    for s, hand in enumerate(hands):
+        if s != seat:
+            for kind in hand:
+                unseen[kind] -= 1
+    return Observation(seat, hands, masks, unseen, view.deck_size, piles,
+                       list(view.discarded), view.blue_coins, view.red_coins, _last_turns(view))
+
+
+def _last_turns(view):
+    "Turns left once the deck is empty (-1 if it is not), from the public history."
+    if view.deck_size:
+        return -1
+    nplayers = len(view.players)
+    draws = Deck.deck_size - Deck.cards_by_player[nplayers]*nplayers
+    moves = [code for code in view.history if code < 50]  # LOST_COIN is not a turn
+    for i, code in enumerate(moves):
+        if code < 10:
+            draws -= 1
+            if draws == 0:  # this move drew the last card
+                return nplayers - (len(moves) - i - 1)
+    return nplayers
+
+
+class Sim:
+    "A determinized game: every card is known. See determinize()."
+    __slots__ = ('hands', 'masks', 'deck', 'piles', 'discarded', 'blue_coins', 'red_coins',
+                 'seat', 'last_turns', 'nplayers')
+
+    def over(self):
+        return self.red_coins == 3 or self.last_turns == 0 or sum(self.piles) == 25
+
+    def score(self):
+        return 0 if self.red_coins == 3 else sum(self.piles)
+
+    def legal(self):
+        "Byte codes of the legal moves."
+        hand = self.hands[self.seat]
+        codes = list(range(len(hand)))
+        if self.blue_coins < 8:
+            codes += range(5, 5+len(hand))
+        if self.blue_coins > 0:
+            n = self.nplayers
+            for target in range(1, n):
+                base = 10 + (target-1)*10
+                hints = set()
+                for kind in self.hands[(self.seat+target) % n]:
+                    hints.add(kind % 5)
+                    hints.add(5 + kind//5)
+                codes += [base+hint for hint in sorted(hints)]
+        return codes
+
+    def apply(self, code):
+        "Apply a legal move."
+        n = self.nplayers
+        if self.last_turns < 0 and not self.deck:
+            self.last_turns = n
+        if code < 10:
+            hand, masks = self.hands[self.seat], self.masks[self.seat]
+            slot = code % 5
+            kind = hand.pop(slot)
+            del masks[slot]
+            if self.deck:
+                hand.append(self.deck.pop())
+                masks.append(ALL_KINDS)
+            color = kind // 5
+            if code < 5 and self.piles[color] == kind % 5:
+                self.piles[color] += 1
+                if kind % 5 == 4 and self.blue_coins < 8:
+                    self.blue_coins += 1
+            else:
+                self.discarded[kind] += 1
+                if code < 5:
+                    self.red_coins += 1
+                else:
+                    self.blue_coins += 1
+        else:
+            target = (self.seat + (code-10)//10 + 1) % n
+            touched = HINT_MASKS[(code-10) % 10]
+            masks = self.masks[target]
+            for slot, kind in enumerate(self.hands[target]):
+                if 1 << kind & touched:
+                    masks[slot] &= touched
+                else:
+                    masks[slot] &= ~touched
+            self.blue_coins -= 1
+        if self.last_turns > 0:
+            self.last_turns -= 1
+        self.seat = (self.seat+1) % n
+
+    def policy(self):
+        """Rule-based move, which only uses what the current player knows of its cards:
+        play a card surely playable, clue a playable card, discard the oldest unclued card."""
+        seat, n = self.seat, self.nplayers
+        playable = 0
+        for color, pile in enumerate(self.piles):
+            if pile < 5:
+                playable |= 1 << (color*5 + pile)
+        for slot, mask in enumerate(self.masks[seat]):
+            if mask & ~playable == 0:
+                return slot
+        if self.blue_coins > 0:
+            for target in range(1, n):
+                other = (seat+target) % n
+                for slot, kind in enumerate(self.hands[other]):
+                    mask = self.masks[other][slot]
+                    if 1 << kind & playable and mask & ~playable:
+                        # the number first, then the color
+                        hint = kind % 5 if mask & ~NUMBER_MASKS[kind % 5] else 5 + kind//5
+                        return 10 + (target-1)*10 + hint
+        if self.blue_coins < 8:
+            for slot, mask in enumerate(self.masks[seat]):
+                if not any(mask & ~known == 0 for known in KNOWN_MASKS):
+                    return 5 + slot
+            return 5
+        return 10 + self.hands[(seat+1) % n][0] % 5
+
+    def rollout(self):
+        "Play until the end with policy(), and return the score."
+        while not self.over():
+            self.apply(self.policy())
+        return self.score()
+
+
+def determinize(obs, rng=random):
+    "A Sim consistent with the Observation, the current player's cards and the deck being sampled."
+    pool = list(obs.unseen)
+    own = _sample_hand(pool, obs.masks[obs.seat], rng)
+    for kind in own:
+        pool[kind] -= 1
+    deck = [kind for kind in range(NKINDS) for _ in range(pool[kind])]
+    rng.shuffle(deck)
+    del deck[obs.deck_size:]  # in case of inconsistent observations
+
+    sim = Sim.__new__(Sim)
+    sim.hands = [own if s == obs.seat else list(hand) for s, hand in enumerate(obs.hands)]
+    sim.masks = [list(masks) for masks in obs.masks]
+    sim.deck = deck
+    sim.piles = list(obs.piles)
+    sim.discarded = list(obs.discarded)
+    sim.blue_coins, sim.red_coins = obs.blue_coins, obs.red_coins
+    sim.seat, sim.last_turns, sim.nplayers = obs.seat, obs.last_turns, len(obs.hands)
+    return sim
+
+
+def _sample_hand(pool, masks, rng, tries=20):
+    """Sample kinds for the cards of a hand, each one within its mask,
+    from the pool of unseen kind counts."""
+    order = sorted(range(len(masks)), key=lambda slot: bin(masks[slot]).count('1'))
+    for attempt in range(tries+1):
+        left = list(pool)
+        hand = [None]*len(masks)
+        for slot in order:
+            mask = masks[slot] if attempt < tries else ALL_KINDS  # at last, give up the clues
+            candidates = [kind for kind in range(NKINDS) if left[kind] > 0 and mask >> kind & 1]
+            if not candidates:
+                break
+            kind = rng.choices(candidates, [left[k] for k in candidates])[0]
+            left[kind] -= 1
+            hand[slot] = kind
+        else:
+            return hand
+    return [kind if kind is not None else 0 for kind in hand]
+
+
+class Node:
+    "A node of the search tree: statistics of the move leading to it, and children by move code."
+    __slots__ = ('children', 'visits', 'total', 'available')
+
+    def __init__(self):
+        self.children = {}
+        self.visits = 0
+        self.total = 0
+        self.available = 0
+
+    def select(self, codes, prior, rng):
+        """Expand an untried move if any (prior first), else pick a move by UCB,
+        with a bonus for prior (the rollout policy's move) which fades with visits.
+        Return (code, child, whether it was expanded)."""
+        children = self.children
+        untried = [code for code in codes if code not in children]
+        for code in codes:
+            if code in children:
+                children[code].available += 1
+        if untried:
+            code = prior if prior in untried else rng.choice(untried)
+            child = children[code] = Node()
+            child.available = 1
+            return code, child, True
+        best, best_code = -1, None
+        for code in codes:
+            child = children[code]
+            value = (child.total / (25*child.visits)
+                     + EXPLORATION*math.sqrt(math.log(child.available) / child.visits))
+            if code == prior:
+                value += PRIOR / child.visits
+            if value > best:
+                best, best_code = value, code
+        return best_code, children[best_code], False
+
+
+def iterate(root, obs, rng=random):
+    "One iteration: sample a world, go down the tree, expand, rollout, back up the score."
+    sim = determinize(obs, rng)
+    node = root
+    path = [root]
+    while not sim.over():
+        if sim.seat == obs.seat:
+            code, node, expanded = node.select(sim.legal(), sim.policy(), rng)
+        else:
+            # the other players are modelled by the rollout policy
+            code = sim.policy()
+            child = node.children.get(code)
+            if child is None:
+                child = node.children[code] = Node()
+            node = child
+            expanded = False
+        sim.apply(code)
+        path.append(node)
+        if expanded:
+            break
+    score = sim.rollout()
+    for node in path:
+        node.visits += 1
+        node.total += score
+
+
+def run(root, obs, deadline=None, iterations=None, rng=random):
+    """Iterate until the deadline (a time.perf_counter() value) or the number of iterations.
+    Return the number of iterations done."""
+    done = 0
+    while (iterations is None or done < iterations) and (
+            deadline is None or time.perf_counter() < deadline):
+        iterate(root, obs, rng)
+        done += 1
+    return done
+
+
+def search(obs, budget=None, iterations=None, seed=None, deadline=None):
+    """Search from scratch, for budget milliseconds (or until deadline, a
+    time.perf_counter() value) or this number of iterations.
+    Return {move code: (visits, total score)} for the root's moves (for pools of workers)."""
+    rng = random.Random(seed)
+    root = Node()
+    if budget is not None:
+        deadline = time.perf_counter() + budget/1000
+    run(root, obs, deadline, iterations, rng)
+    return {code: (child.visits, child.total) for (code, child) in root.children.items()}
+
+
+def best_move(stats):
+    "The most visited move of {code: (visits, total)}, ties broken by the mean score."
+    return max(stats, key=lambda code: (stats[code][0], stats[code][1]))
+
+
+def fallback(obs, rng=random):
+    "The rule-based move on a sampled world, when there is no time to search."
+    return determinize(obs, rng).policy()
+
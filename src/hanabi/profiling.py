@@ -0,0 +1,144 @@
+"""
+Opt-in instrumentation of games: where does the time go?
+
+Instruments counts and times, per game:
+
+- the actions of the engine: play, discard and clue (see Game.step),
+- the text output (log) and the observers (events, see hanabi.events),
+- whole turns (turn), and the decisions of game.ai (ai).
+
+Each Timer keeps a count, a total time and a histogram of durations
+(powers of 2 of microseconds), so instruments of many games (and of many
+processes, see hanabi.tournament.summarize) are merged exactly.
+Timings are inclusive: turn contains ai, play contains events...
+
+    >>> instruments = Instruments()
+    >>> instruments.attach(game)
+    >>> game.run()
+    >>> instruments.detach(game)
+    >>> print(instruments)
+
+attach() replaces the timed methods of this Game object only, and detach()
+puts them back: without instruments, the engine runs exactly as before.
+
+.. autosummary::
+   Timer
+   Instruments
+"""
+
+import time
+
+# timer name: method of Game
+METHODS = {
+    'play': '_play_card',
+    'discard': '_discard_card',
+    'clue': '_give_clue',
+    'log': 'log',
+    'events': '_emit',
+    'turn': 'turn',
+}
+
+
+class Timer:
+    "Count, total time and histogram of durations of a timed function."
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.histogram = {}  # bucket: count, bucket b is [2**(b-1), 2**b) microseconds
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        bucket = int(seconds * 1e6).bit_length()
+        self.histogram[bucket] = self.histogram.get(bucket, 0) + 1
+
+    def merge(self, other):
+        self.count += other.count
+        self.total += other.total
+        for bucket, count in other.histogram.items():
+            self.histogram[bucket] = self.histogram.get(bucket, 0) + count
+        return self
+
+    @property
+    def mean(self):
+        "Mean duration, in seconds."
+        return self.total / self.count if self.count else 0
+
+    def to_dict(self):
+        return {'count': self.count, 'total': self.total,
+                'histogram_us': {'<%d'%(1 << bucket): count
+                                 for bucket, count in sorted(self.histogram.items())}}
+
+
+class Instruments:
+    "Timers of the engine and of the AI, by name (see METHODS, and 'ai')."
+
+    def __init__(self):
+        self.timers = {}
+
+    def timer(self, name):
+        timer = self.timers.get(name)
+        if timer is None:
+            timer = self.timers[name] = Timer()
+        return timer
+
+    def _timed(self, name, function):
+        timer = self.timer(name)
+        clock = time.perf_counter
+
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                timer.add(clock() - start)
+        timed.instrumented = True
+        return timed
+
+    def attach(self, game):
+        "Time the actions of game, and the decisions of its AI (even if it is set later)."
+        for name, method in METHODS.items():
+            if name != 'turn':
+                setattr(game, method, self._timed(name, getattr(game, method)))
+        turn = self._timed('turn', game.turn)
+
+        def instrumented_turn(*args, **kwargs):
+            ai = game.ai
+            if ai is not None and not getattr(ai.play, 'instrumented', False):
+                ai.play = self._timed('ai', ai.play)
+            return turn(*args, **kwargs)
+        instrumented_turn.instrumented = True
+        game.turn = instrumented_turn
+        return self
+
+    def detach(self, game):
+        "Stop timing game (and its AI)."
+        for method in METHODS.values():
+            if getattr(game.__dict__.get(method), 'instrumented', False):
+                delattr(game, method)
+        ai = game.ai
+        if ai is not None and getattr(ai.__dict__.get('play'), 'instrumented', False):
+            del ai.play
+
+    def merge(self, other):
+        "Add the timings of other Instruments, and return self."
+        for name, timer in other.timers.items():
+            self.timer(name).merge(timer)
+        return self
+
+    def to_dict(self):
+        "The timings, as a dict (for json)."
+        return {name: timer.to_dict() for name, timer in sorted(self.timers.items())}
+
+    def __str__(self):
+        lines = ["%-8s %9s %10s %10s"%('', 'count', 'total (s)', 'mean (us)')]
+        for name, timer in sorted(self.timers.items()):
+            lines.append("%-8s %9d %10.3f %10.1f"%(name, timer.count, timer.total,
+                                                   timer.mean*1e6))
+        ai = self.timers.get('ai')
+        if ai is not None:
+            lines.append("AI decisions (microseconds: count):")
+            for bucket, count in sorted(ai.histogram.items()):
+                lines.append("%12s: %d"%('<%d'%(1 << bucket), count))
+        return "\n".join(lines)
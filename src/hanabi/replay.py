@@ -0,0 +1,294 @@
+"""
+Compact binary replays.
+
+A replay is a small header (number of players, AI name, score), the deck
+(its seed, or its 50 bytes, see Deck.to_bytes) and one byte per move
+(see hanabi.action.encode). Many replays can be appended to a single file,
+and read back one at a time:
+
+    >>> with open('games.hnb', 'ab') as f:
+    ...     writer = ReplayWriter(f)
+    ...     writer.write(Replay.from_game(game))
+    >>> with open('games.hnb', 'rb') as f:
+    ...     for replay in ReplayReader(f):
+    ...         print(replay.score, replay.game().score)
+
+Loading a replay does not execute anything. Old replays (the python files
+written by former versions, such as test/game*.py) are parsed, not executed,
+and may be converted:
+
+    python3 -m hanabi.replay -o games.hnb test/game*.py
+
+To record the replays of games as they end, subscribe a ReplayRecorder
+(see hanabi.events):
+
+    >>> game.subscribe(ReplayRecorder(game, writer, lost_only=True))
+
+To look at a replay move by move, back and forth, use a Navigator:
+
+    >>> nav = Navigator(replay)
+    >>> game = nav.seek(30)   # the game after 30 moves
+    >>> nav.back(); nav.forward()
+
+.. autosummary::
+   Replay
+   ReplayWriter
+   ReplayReader
+   ReplayRecorder
+   Navigator
+   read_legacy
+   convert_legacy
+"""
+
+import ast
+import struct
+from collections import namedtuple
+
+from .deck import Card, Color, Deck, Game
+from .events import Observer
+
+
+MAGIC = b'HANABI\x01\n'
+# flags, players, score, length of ai name, number of moves, seed
+HEADER = struct.Struct('<BBBBHQ')
+FLAG_SEED = 1
+
+
+class Replay(namedtuple('Replay', 'players ai score seed deck moves')):
+    """A recorded game.
+
+    players is the number of players, ai the name of the AI class ('' for humans),
+    the deck is either seed, or deck (bytes, see Deck.to_bytes), the other being None.
+    moves is the bytes of the valid moves (see Game.history).
+    """
+    __slots__ = ()
+
+    @classmethod
+    def from_game(cls, game):
+        "The replay of a game (played or being played)."
+        ai = type(game.ai).__name__ if game.ai is not None else ''
+        if game.seed is not None:
+            deck = None
+        else:
+            deck = game.deck.to_bytes()
+        return cls(len(game.players), ai, game.score, game.seed, deck, bytes(game.history))
+
+    def game(self, moves=None):
+        """Replay the game (silently), up to the given number of moves
+        (all of them by default), and return it."""
+        if self.seed is not None:
+            game = Game(self.players, seed=self.seed)
+        else:
+            game = Game(self.players, cards=Deck.from_bytes(self.deck).cards)
+        game.headless = True
+        self.play(game, moves)
+        return game
+
+    def play(self, game, moves=None):
+        "Apply the moves of this replay to game (which must start on the replay's deck), and return it."
+        for code in self.moves[:moves]:
+            try:
+                game.apply_code(code)
+            except StopIteration:  # 3 red coins
+                break
+        return game
+
+    def to_bytes(self):
+        """The binary encoding of this replay.
+        A seed which is not an unsigned 64-bit int is encoded as its deck."""
+        ai = self.ai.encode('ascii')
+        seed, deck = self.seed, self.deck
+        if seed is not None and not (isinstance(seed, int) and 0 <= seed < 2**64):
+            seed, deck = None, Deck.from_seed(seed).to_bytes()
+        flags = FLAG_SEED if seed is not None else 0
+        header = HEADER.pack(flags, self.players, self.score, len(ai),
+                             len(self.moves), seed or 0)
+        return header + (deck or b'') + ai + bytes(self.moves)
+
+
+class ReplayWriter:
+    """Append replays to a binary file (opened in 'ab' or 'wb' mode).
+    The file header is written if the file is empty.
+    """
+
+    def __init__(self, f):
+        self.file = f
+        if f.tell() == 0:
+            f.write(MAGIC)
+
+    def write(self, replay):
+        self.file.write(replay.to_bytes())
+
+
+class ReplayRecorder(Observer):
+    """Observer which writes the replay of game with writer (a ReplayWriter)
+    when the game ends, or only if it is lost (less than 25 points) with lost_only."""
+
+    def __init__(self, game, writer, lost_only=False):
+        self.game = game
+        self.writer = writer
+        self.lost_only = lost_only
+
+    def on_game_end(self, event):
+        if not (self.lost_only and event.score == 25):
+            self.writer.write(Replay.from_game(self.game))
+
+
+class ReplayReader:
+    "Iterate over the replays of a binary file (opened in 'rb' mode), one at a time."
+
+    def __init__(self, f):
+        self.file = f
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError("This is not a hanabi replay file.")
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        f = self.file
+        data = f.read(HEADER.size)
+        if not data:
+            raise StopIteration
+        if len(data) < HEADER.size:
+            raise ValueError("Truncated replay file.")
+        flags, players, score, ai_length, nmoves, seed = HEADER.unpack(data)
+        if flags & FLAG_SEED:
+            deck = None
+        else:
+            deck = f.read(Deck.deck_size)
+            seed = None
+        ai = f.read(ai_length).decode('ascii')
+        moves = f.read(nmoves)
+        if len(moves) < nmoves:
+            raise ValueError("Truncated replay file.")
+        return Replay(players, ai, score, seed, deck, moves)
+
+
+class Navigator:
+    """Random access to the states of a replayed game.
+
+    A snapshot of the game is kept every `interval` moves, so that seek(),
+    forward() and back() apply at most `interval` moves.
+    nav.game is the current state, after nav.position moves: don't modify it
+    (it is the same Game object, moved back and forth).
+    """
+
+    def __init__(self, replay, interval=8):
+        self.replay = replay
+        self.interval = interval
+        game = replay.game(0)
+        self.checkpoints = [game.snapshot()]
+        self.length = 0
+        for code in replay.moves:
+            try:
+                game.apply_code(code)
+            except StopIteration:  # 3 red coins: this is the last move
+                self.length += 1
+                break
+            self.length += 1
+            if self.length % interval == 0:
+                self.checkpoints.append(game.snapshot())
+        self.game = game
+        self.seek(0)
+
+    def __len__(self):
+        "Number of moves."
+        return self.length
+
+    def seek(self, position):
+        "Go to the state after `position` moves (clamped to the replay), and return it."
+        position = max(0, min(position, self.length))
+        checkpoint = position // self.interval
+        self.game.restore(self.checkpoints[checkpoint])
+        self.position = checkpoint * self.interval
+        while self.position < position:
+            self._apply_next()
+        return self.game
+
+    def _apply_next(self):
+        try:
+            self.game.apply_code(self.replay.moves[self.position])
+        except StopIteration:
+            pass
+        self.position += 1
+
+    def forward(self):
+        "Go one move forward, and return the state."
+        if self.position < self.length:
+            self._apply_next()
+        return self.game
+
+    def back(self):
+        "Go one move back, and return the state."
+        return self.seek(self.position-1)
+
+
+def is_replay_file(filename):
+    "Whether filename is a binary replay file."
+    f = open(filename, 'rb')
+    magic = f.read(len(MAGIC))
+    f.close()
+    return magic == MAGIC
+
+
+def _legacy_value(node):
+    "Value of an expression of a legacy replay: literals, Card(Color.X, n) or lists of these."
+    if isinstance(node, (ast.List, ast.Tuple)):
+        return [_legacy_value(x) for x in node.elts]
+    if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name)
+            and node.func.id == 'Card' and len(node.args) == 2
+            and isinstance(node.args[0], ast.Attribute)
+            and isinstance(node.args[0].value, ast.Name)
+            and node.args[0].value.id == 'Color'):
+        return Card(Color[node.args[0].attr], ast.literal_eval(node.args[1]))
+    return ast.literal_eval(node)
+
+
+def read_legacy(filename):
+    """Read an old replay (python source, with the variables players,
+    cards or seed, and moves) without executing it. Return a dict."""
+    f = open(filename)
+    tree = ast.parse(f.read(), filename)
+    f.close()
+    loaded = {}
+    for node in tree.body:
+        if isinstance(node, ast.Expr):
+            continue  # comment strings
+        if not (isinstance(node, ast.Assign) and len(node.targets) == 1
+                and isinstance(node.targets[0], ast.Name)):
+            raise ValueError("%s: unexpected statement line %d"%(filename, node.lineno))
+        loaded[node.targets[0].id] = _legacy_value(node.value)
+    return loaded
+
+
+def convert_legacy(filename):
+    "Replay an old replay file (silently), and return its Replay."
+    game = Game(2)
+    game.quiet = True
+    try:
+        game.load(filename)
+    except StopIteration:  # 3 red coins
+        pass
+    return Replay.from_game(game)
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(
+        description='Convert old python replays (such as test/game*.py) to a binary replay file.')
+    parser.add_argument('legacy', nargs='+', help='old replay files')
+    parser.add_argument('-o', '--output', required=True, help='binary replay file (appended)')
+    args = parser.parse_args(argv)
+
+    f = open(args.output, 'ab')
+    writer = ReplayWriter(f)
+    for filename in args.legacy:
+        replay = convert_legacy(filename)
+        writer.write(replay)
+        print(filename, "score", replay.score, "moves", len(replay.moves))
+    f.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,297 @@
+"""
+A Hanabi server: many tables in one asyncio event loop, over TCP.
+
+Humans (with telnet, or any program) and AIs (any hanabi.ai class, played
+by the server) take the seats of a table; its game starts when it is full.
+Each player only receives what its seat sees (see hanabi.view.PlayerView):
+its own cards are never sent to it.
+
+    >>> hanabi.server.main(port=7777)     # or: hanabi --serve 7777
+
+The protocol is made of lines of text. Commands of the clients:
+
+    new N [SEED]     create a table of N players, answer: table T
+    tables           the tables, answer: tables T:FREE/N ...
+    join T           take a free seat of table T, answer: seat S NAME
+    bot T AI         seat an AI, a class of hanabi.ai (see hanabi.ai.by_name),
+                     answer: seat S NAME
+    p1, d2, cR, cR2  a move, at your turn (see hanabi.action.parse)
+    quit
+
+Lines sent by the server: error MESSAGE, start NAMES, turn NAME, and
+the events of the game (see hanabi.events): play, misplay and discard
+NAME SLOT CARD, clue NAME TARGET HINT SLOTS, draw NAME [CARD] (the card is
+not sent to the one who draws it), end SCORE REASON. At your turn, the
+server sends what you see:
+
+    hand ** R* *1 ** **              what you know of your cards
+    sees Benji R1:** G3:*3 ...       the cards of the others, and what they know
+    piles R0 B1 G0 W0 Y0
+    coins 7 0 deck 39
+    discarded B4
+    moves p1 p2 ... d1 ... cR1 ...   your legal moves
+    your turn
+
+.. autosummary::
+   Server
+   Table
+   Client
+"""
+
+import asyncio
+import itertools
+
+from . import ai
+from .action import parse, INVALID
+from .deck import Game
+from .events import Observer, INTERRUPTED
+from .view import PlayerView
+
+
+def view_lines(view):
+    "What the player of a PlayerView sees, as lines of the protocol."
+    lines = ['hand ' + view.hand.str_clue()]
+    for name, hand in zip(view.players[1:], view.other_hands):
+        lines.append('sees %s %s'%(name, ' '.join(['%s:%s'%(card, card.str_clue())
+                                                   for card in hand])))
+    lines.append('piles ' + ' '.join(['%s%d'%(color.name[0], height)
+                                      for color, height in view.piles.items()]))
+    lines.append('coins %d %d deck %d'%(view.blue_coins, view.red_coins, view.deck_size))
+    lines.append('discarded ' + ' '.join(map(str, view.discard_pile)))
+    lines.append('moves ' + ' '.join(map(str, view.legal_actions())))
+    return lines
+
+
+class Table(Observer):
+    """A game, and who sits at each seat: a Client, an AI, or None (free).
+    The table observes its game, and sends its events to the clients."""
+
+    def __init__(self, number, players, seed=None):
+        self.number = number
+        self.game = Game(players, seed=seed)
+        self.game.headless = True
+        self.game.subscribe(self)
+        self.seats = [None]*players
+        self.views = [PlayerView(self.game, seat) for seat in range(players)]
+        self.finished = False
+
+    @property
+    def free(self):
+        "Number of free seats."
+        return self.seats.count(None)
+
+    def sit(self, player):
+        "Give a free seat to player (a Client or an AI), and return it."
+        if not self.free or self.finished:
+            raise ValueError("table %d is full"%self.number)
+        seat = self.seats.index(None)
+        self.seats[seat] = player
+        return seat
+
+    def name(self, seat):
+        return self.game._players[seat]
+
+    def send(self, seat, line):
+        player = self.seats[seat]
+        if isinstance(player, Client):
+            player.send(line)
+
+    def broadcast(self, line):
+        for seat in range(len(self.seats)):
+            self.send(seat, line)
+
+    async def advance(self):
+        "Play the turns of the AIs, until a human has to play or the game is over."
+        game = self.game
+        loop = asyncio.get_running_loop()
+        while not (game.over or self.finished):
+            player = self.seats[game.seat]
+            if isinstance(player, Client):
+                self.broadcast('turn ' + self.name(game.seat))
+                for line in view_lines(self.views[game.seat]):
+                    player.send(line)
+                player.send('your turn')
+                return
+            # AIs think in a thread: the other tables go on meanwhile
+            action = await loop.run_in_executor(None, player.play)
+            if not self.finished:
+                game.step(action)  # an invalid move is asked again, as in Game.turn
+
+    def on_game_start(self, event):
+        self.broadcast('start ' + ' '.join(event.players))
+
+    def on_play(self, event):
+        self.broadcast('play %s %d %s'%(self.name(event.seat), event.slot, event.card))
+
+    def on_misplay(self, event):
+        self.broadcast('misplay %s %d %s'%(self.name(event.seat), event.slot, event.card))
+
+    def on_discard(self, event):
+        self.broadcast('discard %s %d %s'%(self.name(event.seat), event.slot, event.card))
+
+    def on_clue(self, event):
+        self.broadcast('clue %s %s %s %s'%(self.name(event.seat), self.name(event.target),
+                                           event.hint, ' '.join(map(str, event.slots))))
+
+    def on_draw(self, event):
+        for seat in range(len(self.seats)):
+            if seat == event.seat:
+                self.send(seat, 'draw ' + self.name(seat))
+            else:
+                self.send(seat, 'draw %s %s'%(self.name(event.seat), event.card))
+
+    def on_game_end(self, event):
+        self.finished = True
+        self.broadcast('end %d %s'%(event.score, event.reason))
+
+
+class Client:
+    "A connection, and the seat it took (table and seat are None until it joins)."
+
+    def __init__(self, server, reader, writer):
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+        self.table = None
+        self.seat = None
+
+    def send(self, line):
+        self.writer.write(line.encode() + b'\n')
+
+    async def serve(self):
+        "Handle the commands of the client, until it quits or disconnects."
+        try:
+            while True:
+                line = await self.reader.readline()
+                words = line.decode(errors='replace').split()
+                if not line or words == ['quit']:
+                    break
+                if words:
+                    try:
+                        await self.handle(words)
+                    except ValueError as e:
+                        self.send('error %s'%e)
+                await self.writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.server.leave(self)
+            self.writer.close()
+
+    async def handle(self, words):
+        "Run a command, raise ValueError if it is not valid."
+        command, args = words[0], words[1:]
+        server = self.server
+        if command == 'new' and 1 <= len(args) <= 2:
+            table = server.new_table(*map(int, args))
+            self.send('table %d'%table.number)
+        elif command == 'tables' and not args:
+            self.send(' '.join(['tables'] + ['%d:%d/%d'%(t.number, t.free, len(t.seats))
+                                             for t in server.tables.values()]))
+        elif command == 'join' and len(args) == 1:
+            if self.table is not None:
+                raise ValueError("already at table %d"%self.table.number)
+            table = server.table(args[0])
+            self.table, self.seat = table, table.sit(self)
+            self.send('seat %d %s'%(self.seat, table.name(self.seat)))
+            await server.start_if_full(table)
+        elif command == 'bot' and len(args) == 2:
+            table = server.table(args[0])
+            cls = ai.by_name(args[1], imports=False)  # no module imported from the network
+            try:
+                player = cls(table.game)
+            except Exception as e:
+                raise ValueError("cannot seat %s: %s"%(args[1], e))
+            seat = table.sit(player)
+            self.send('seat %d %s'%(seat, table.name(seat)))
+            await server.start_if_full(table)
+        elif len(words) == 1 and self.table is not None:
+            await self.move(command)
+        else:
+            raise ValueError("unknown command %s"%' '.join(words))
+
+    async def move(self, text):
+        table, game = self.table, self.table.game
+        if table.free or table.finished or game.seat != self.seat:
+            raise ValueError("not your turn")
+        if game.step(parse(text)) == INVALID:
+            raise ValueError("invalid move %s"%text)
+        await table.advance()
+        self.server.close_if_finished(table)
+
+
+class Server:
+    """Tables, by number, and their players.
+
+        >>> server = Server()
+        >>> await server.start('127.0.0.1', 7777)
+    """
+
+    def __init__(self):
+        self.tables = {}
+        self._numbers = itertools.count(1)
+        self._server = None
+
+    async def start(self, host='127.0.0.1', port=0):
+        "Listen on host:port (a free port if it is 0, see self.port), and return the asyncio server."
+        self._server = await asyncio.start_server(self._connect, host, port)
+        return self._server
+
+    @property
+    def port(self):
+        return self._server.sockets[0].getsockname()[1]
+
+    async def _connect(self, reader, writer):
+        await Client(self, reader, writer).serve()
+
+    def new_table(self, players, seed=None):
+        if not 2 <= players <= 5:
+            raise ValueError("a table has 2 to 5 players")
+        number = next(self._numbers)
+        table = self.tables[number] = Table(number, players, seed)
+        return table
+
+    def table(self, number):
+        "The table of this number (a str or an int)."
+        try:
+            return self.tables[int(number)]
+        except (KeyError, ValueError):
+            raise ValueError("no table %s"%number)
+
+    async def start_if_full(self, table):
+        if table.free:
+            return
+        table.game._start()
+        await table.advance()
+        self.close_if_finished(table)
+
+    def close_if_finished(self, table):
+        if not table.finished:
+            return
+        self.tables.pop(table.number, None)
+        for player in table.seats:
+            if isinstance(player, Client):
+                player.table = player.seat = None
+
+    def leave(self, client):
+        "The client is gone: its game (if any) is interrupted."
+        table = client.table
+        if table is None:
+            return
+        table.seats[client.seat] = None
+        if table.free == len(table.seats):
+            table.finished = True
+        elif table.game._started:
+            table.game._end(INTERRUPTED)
+        self.close_if_finished(table)
+        client.table = client.seat = None
+
+
+def main(host='127.0.0.1', port=7777):
+    "Serve forever."
+    async def serve():
+        server = Server()
+        async with await server.start(host, port) as listener:
+            print("Hanabi server on %s:%d"%(host, server.port))
+            await listener.serve_forever()
+    asyncio.run(serve())
@@ -0,0 +1,398 @@
+"""
+Perfect-information solver: the best possible score of a deck.
+
+Like the Cheater AI, the solver sees every card. It explores the game with
+a depth-first search, ordered moves, a transposition table (see
+hanabi.zobrist), and branch-and-bound on an upper bound of the final score.
+With full information a clue only costs a blue coin, so only one clue
+is considered per turn. No move order suits every deck (a clue may wait
+for the next cards, or waste a turn): the search restarts with the other
+one when it is too long, and keeps its transposition table.
+
+Usage:
+
+    >>> import hanabi.solver
+    >>> solution = hanabi.solver.solve(hanabi.deck.Deck.from_seed(1), players=3)
+    >>> solution.score, solution.exact, len(solution.moves)
+
+The moves of the solution are Actions, which may be applied to a Game
+dealt from the same deck.
+
+.. autosummary::
+   Solution
+   Solver
+   solve
+"""
+
+import time
+from collections import namedtuple
+
+from . import zobrist
+from .deck import Deck
+from .action import Play, Discard, Clue
+
+
+Solution = namedtuple('Solution', 'score moves exact nodes')
+Solution.__doc__ = """Result of the solver.
+
+score is the best score found, and exact tells if it is proven optimal
+(else the search was stopped by its limits, and score is a lower bound).
+moves is a list of Actions which reach this score.
+"""
+
+# moves of the solver: (type, slot), slot being 0-based
+PLAY, DISCARD, CLUE, MISPLAY = 0, 1, 2, 3
+
+KIND_COUNT = Deck.kind_count
+
+
+class _Stop(Exception):
+    "The search reached its node or time limit."
+
+
+class _Restart(Exception):
+    "The search reached the node budget of its move order."
+
+
+class Solver:
+    """Exact solver for a deck (a Deck, or a list of cards or of card kinds)
+    and a number of players.
+
+    node_limit and time_limit (in seconds) stop the search early:
+    the solution is then the best game found, not proven optimal.
+    table_size is the number of entries of the transposition table.
+    """
+
+    restart_nodes = 20000  # node budget of the first move order
+
+    def __init__(self, deck, players=2, node_limit=None, time_limit=None, table_size=2**20):
+        if isinstance(deck, Deck):
+            deck = deck.to_bytes()
+        self.deck = [c if isinstance(c, int) else c.kind for c in deck]
+        self.nplayers = players
+        self.hand_size = Deck.cards_by_player[players]
+        self.node_limit = node_limit
+        self.time_limit = time_limit
+        self.table = zobrist.TranspositionTable(table_size)
+
+        # first[position][kind]: the first index >= position of a card of kind in the deck
+        never = len(self.deck)
+        first = [[never]*len(KIND_COUNT)]
+        for i in range(len(self.deck)-1, -1, -1):
+            row = list(first[0])
+            row[self.deck[i]] = i
+            first.insert(0, row)
+        self.first = first
+
+        n, h = self.nplayers, self.hand_size
+        self.hands = [self.deck[i*h:(i+1)*h] for i in range(n)]
+        self.position = n*h
+        self.piles = [0]*5
+        self.discarded = [0]*len(KIND_COUNT)
+        self.blue_coins = 8
+        self.red_coins = 0
+        self.seat = 0
+        self.last_turns = -1  # turns left once the deck is empty
+        self.nodes = 0
+        self.restart = None
+        self.stall_first = False
+        self.hash = self._compute_hash()
+
+    # --- rules ---
+
+    def _over(self):
+        return (self.red_coins == 3 or self.last_turns == 0
+                or sum(self.piles) == 25)
+
+    def _score(self):
+        return 0 if self.red_coins == 3 else sum(self.piles)
+
+    def _turns_left(self):
+        "Maximum number of turns left."
+        if self.last_turns >= 0:
+            return self.last_turns
+        return len(self.deck) - self.position + self.nplayers
+
+    def _bound(self):
+        """Upper bound of the final score.
+
+        Every play or discard draws a card, and the game ends a round after the
+        last one: at most slots = _turns_left() more cards are played, the card
+        drawn by the ith of these moves at the earliest by the move i+1 (the
+        last card of the deck by the last move: its player has no other turn),
+        and a card after the lower one of its color. A card is ready at the
+        move whose index is the first this allows, and the cards ready before
+        the last moves get them: the latest first.
+        In the last round, each player left plays at most one card, of its hand.
+        """
+        slots = self._turns_left()
+        piles, deck = self.piles, self.deck
+        in_hands = set()
+        for hand in self.hands:
+            in_hands.update(hand)
+        if self.position == len(deck):
+            # the cards which may still be played, and the players left who have one
+            useful = set()
+            for color in range(5):
+                for kind in range(color*5 + piles[color], color*5+5):
+                    if kind not in in_hands:
+                        break
+                    useful.add(kind)
+            players = sum(1 for i in range(slots)
+                          if not useful.isdisjoint(self.hands[(self.seat+i) % self.nplayers]))
+            return sum(piles) + min(players, len(useful))
+
+        first = self.first[self.position]
+        last = len(deck) - 1
+        position = self.position - 1  # a card drawn at the next move is ready for the second one
+        ready = []
+        for color in range(5):
+            time = -1
+            for kind in range(color*5 + piles[color], color*5+5):
+                if kind in in_hands:
+                    time += 1
+                elif first[kind] > last:  # lost
+                    break
+                elif first[kind] == last:
+                    time = max(time+1, slots-1)
+                else:
+                    time = max(time+1, first[kind] - position)
+                if time >= slots:  # buried too deep in the deck
+                    break
+                ready.append(time)
+        ready.sort(reverse=True)
+        slot = slots - 1  # the last move
+        for time in ready:
+            if time <= slot:
+                slot -= 1
+        return sum(piles) + slots - 1 - slot
+
+    def _compute_hash(self):
+        "Zobrist hash of the state, hands being multisets of cards (the order does not matter)."
+        h = (zobrist.POSITION[self.position] ^ zobrist.SEAT[self.seat]
+             ^ zobrist.BLUE_COINS[self.blue_coins] ^ zobrist.RED_COINS[self.red_coins]
+             ^ zobrist.LAST_TURNS[self.last_turns+1])
+        for color, pile in enumerate(self.piles):
+            h ^= zobrist.PILES[color*6 + pile]
+        for seat, hand in enumerate(self.hands):
+            for kind in range(zobrist.NKINDS):
+                h ^= zobrist.HAND_COUNTS[(seat*zobrist.NKINDS + kind)*4 + hand.count(kind)]
+        return h
+
+    def _hand_key(self, hand, kind):
+        "Key of the number of cards of this kind in current hand."
+        return zobrist.HAND_COUNTS[(self.seat*zobrist.NKINDS + kind)*4 + hand.count(kind)]
+
+    def _moves(self):
+        "Possible moves, the most promising first. Moves on cards of the same kind are equivalent."
+        hand = self.hands[self.seat]
+        piles = self.piles
+        plays, useless, safe, critical, misplays = [], [], [], [], []
+        seen = set()
+        for slot, kind in enumerate(hand):
+            if kind in seen:
+                continue
+            seen.add(kind)
+            color, number = divmod(kind, 5)
+            number += 1
+            if piles[color]+1 == number:
+                plays.append((number, (PLAY, slot)))
+                continue
+            if self.red_coins < 2:
+                misplays.append((MISPLAY, slot))
+            if self.blue_coins == 8:
+                continue
+            if number <= piles[color] or hand.count(kind) > 1 or any(
+                    kind in other for other in self.hands if other is not hand):
+                useless.append((DISCARD, slot))
+            elif self.discarded[kind]+1 == KIND_COUNT[kind]:
+                critical.append((-number, (DISCARD, slot)))
+            else:
+                safe.append((-number, (DISCARD, slot)))
+        plays.sort()
+        safe.sort()
+        critical.sort()
+        plays = [m for (_, m) in plays]
+        clue = [(CLUE, 0)] if self.blue_coins > 0 else []
+        # a clue waits for the next cards: first, every other restart of the search
+        moves = clue + plays if self.stall_first else plays + clue
+        return (moves + useless + [m for (_, m) in safe] + [m for (_, m) in critical]
+                + misplays)
+
+    def _apply(self, move):
+        "Apply a move, return what undo needs."
+        kind_of_move, slot = move
+        undo = (self.blue_coins, self.red_coins, self.position, self.last_turns, self.seat,
+                self.hash)
+        h = (self.hash ^ zobrist.POSITION[self.position] ^ zobrist.SEAT[self.seat]
+             ^ zobrist.BLUE_COINS[self.blue_coins] ^ zobrist.RED_COINS[self.red_coins]
+             ^ zobrist.LAST_TURNS[self.last_turns+1])
+        if self.last_turns < 0 and self.position == len(self.deck):
+            self.last_turns = self.nplayers
+        if kind_of_move == CLUE:
+            self.blue_coins -= 1
+            card = None
+        else:
+            hand = self.hands[self.seat]
+            card = hand[slot]
+            h ^= self._hand_key(hand, card)
+            del hand[slot]
+            h ^= self._hand_key(hand, card)
+            if self.position < len(self.deck):
+                new = self.deck[self.position]
+                h ^= self._hand_key(hand, new)
+                hand.append(new)
+                h ^= self._hand_key(hand, new)
+                self.position += 1
+            if kind_of_move == PLAY:
+                pile = card//5*6 + self.piles[card//5]
+                h ^= zobrist.PILES[pile] ^ zobrist.PILES[pile+1]
+                self.piles[card//5] += 1
+                if card % 5 == 4 and self.blue_coins < 8:
+                    self.blue_coins += 1
+            else:
+                self.discarded[card] += 1
+                if kind_of_move == DISCARD:
+                    self.blue_coins += 1
+                else:
+                    self.red_coins += 1
+        if self.last_turns > 0:
+            self.last_turns -= 1
+        self.seat = (self.seat+1) % self.nplayers
+        self.hash = (h ^ zobrist.POSITION[self.position] ^ zobrist.SEAT[self.seat]
+                     ^ zobrist.BLUE_COINS[self.blue_coins] ^ zobrist.RED_COINS[self.red_coins]
+                     ^ zobrist.LAST_TURNS[self.last_turns+1])
+        return undo + (move, card)
+
+    def _undo(self, undo):
+        (self.blue_coins, self.red_coins, position, self.last_turns, self.seat, self.hash,
+         (kind_of_move, slot), card) = undo
+        if kind_of_move == CLUE:
+            return
+        hand = self.hands[self.seat]
+        if self.position != position:
+            hand.pop()
+            self.position = position
+        hand.insert(slot, card)
+        if kind_of_move == PLAY:
+            self.piles[card//5] -= 1
+        else:
+            self.discarded[card] -= 1
+
+    # --- search ---
+
+    def _search(self, alpha):
+        """Best final score from the current state.
+        If it is <= alpha, the returned value may only be an upper bound."""
+        if self._over():
+            score = self._score()
+            if score > self.best_score:
+                self.best_score = score
+                self.best_line = list(self.path)
+            return score
+        self.nodes += 1
+        if self.node_limit is not None and self.nodes > self.node_limit:
+            raise _Stop()
+        if self.deadline is not None and self.nodes % 1024 == 0 and time.time() > self.deadline:
+            raise _Stop()
+        if self.restart is not None and self.nodes > self.restart:
+            raise _Restart()
+
+        bound = self._bound()
+        if bound <= alpha:
+            return bound
+        key = self.hash
+        entry = self.table.get(key)
+        if entry is not None:
+            value, exact, move = entry
+            if exact or value <= alpha:
+                return value
+            bound = min(bound, value)
+
+        best, best_move = -1, None
+        for move in self._moves():
+            undo = self._apply(move)
+            self.path.append(undo)
+            value = self._search(max(alpha, best))
+            self.path.pop()
+            self._undo(undo)
+            if value > best:
+                best, best_move = value, move
+                if best >= bound:
+                    break
+        self.table.store(key, self._turns_left(), (best, best > alpha, best_move))
+        self.best_move = best_move
+        return best
+
+    def _action(self, move):
+        "The Action of a solver move, in the current state."
+        kind_of_move, slot = move
+        if kind_of_move in (PLAY, MISPLAY):
+            return Play(slot+1)
+        if kind_of_move == DISCARD:
+            return Discard(slot+1)
+        target = self.hands[(self.seat+1) % self.nplayers]
+        return Clue(str(target[0] % 5 + 1), 1)
+
+    def _best_line(self):
+        "The moves of the best game found (the state must be the initial one)."
+        actions = []
+        for undo in self.best_line:
+            move = undo[-2]
+            actions.append(self._action(move))
+            self._apply(move)
+        for undo in reversed(self.best_line):
+            self._undo(undo)
+        return actions
+
+    def _principal_line(self):
+        "The moves of an optimal game, from the table (the state must be the initial one)."
+        actions, undos = [], []
+        while not self._over():
+            entry = self.table.get(self.hash)
+            if entry is not None and entry[1]:
+                move = entry[2]
+            else:
+                self._search(-1)
+                move = self.best_move
+            actions.append(self._action(move))
+            undos.append(self._apply(move))
+        for undo in reversed(undos):
+            self._undo(undo)
+        return actions
+
+    def solve(self):
+        """Search, and return a Solution.
+
+        The search restarts with the other move order (see _moves), and twice
+        its budget of nodes, every time it exceeds it: the transposition table
+        is kept, and only a better score than the best found is searched.
+        """
+        self.nodes = 0
+        self.best_score, self.best_line = -1, []
+        self.deadline = None if self.time_limit is None else time.time() + self.time_limit
+        self.stall_first = False
+        budget = self.restart_nodes
+        while True:
+            self.path = []
+            self.restart = self.nodes + budget
+            alpha = self.best_score
+            try:
+                score = self._search(alpha)
+                break
+            except (_Stop, _Restart) as e:
+                # back to the initial state
+                for undo in reversed(self.path):
+                    self._undo(undo)
+                if isinstance(e, _Stop):
+                    return Solution(self.best_score, self._best_line(), False, self.nodes)
+            self.stall_first = not self.stall_first
+            budget *= 2
+        self.deadline = self.node_limit = self.restart = None
+        if score <= alpha:  # no better game than the best one found
+            return Solution(self.best_score, self._best_line(), True, self.nodes)
+        return Solution(score, self._principal_line(), True, self.nodes)
+
+def solve(deck, players=2, node_limit=None, time_limit=None, table_size=2**20):
+    "Solve a deck, see Solver."
+    return Solver(deck, players, node_limit, time_limit, table_size).solve()
@@ -0,0 +1,155 @@
+"""
+Streaming statistics of many games, in constant memory.
+
+A Summary is updated game after game: scores are integers from 0 to 25,
+so their histogram gives the mean, variance, min, max and percentiles
+exactly, whatever the number of games. Turns are summarized the same way.
+Summaries computed separately (in worker processes, see
+hanabi.tournament.summarize) are merged exactly with + or merge().
+
+    >>> summary = Summary()
+    >>> for result in hanabi.tournament.run('Cheater', 3, range(1000)):
+    ...     summary.add_result(result)
+    >>> summary.mean, summary.stdev, summary.percentile(10), summary.reasons
+    >>> print(summary)
+
+.. autosummary::
+   Summary
+"""
+
+import math
+
+MAX_SCORE = 25
+
+
+class Summary:
+    """Score histogram, end reasons and turn counts of a stream of games.
+
+    Memory does not depend on the number of games: the turn histogram has
+    one entry per distinct number of turns (less than a hundred).
+    """
+
+    def __init__(self):
+        self.histogram = [0]*(MAX_SCORE+1)  # number of games of each score
+        self.turns = {}    # number of games of each length (in turns)
+        self.reasons = {}  # number of games of each end reason (see hanabi.events)
+
+    def add(self, score, turns=0, reason=None):
+        "Add a game."
+        self.histogram[score] += 1
+        self.turns[turns] = self.turns.get(turns, 0) + 1
+        if reason is not None:
+            self.reasons[reason] = self.reasons.get(reason, 0) + 1
+
+    def add_result(self, result):
+        "Add a game from its hanabi.tournament.Result."
+        self.add(result.score, result.turns, result.reason)
+
+    def merge(self, other):
+        "Add the games of another Summary, and return self."
+        for score, count in enumerate(other.histogram):
+            self.histogram[score] += count
+        for counts, others in ((self.turns, other.turns), (self.reasons, other.reasons)):
+            for key, count in others.items():
+                counts[key] = counts.get(key, 0) + count
+        return self
+
+    def __iadd__(self, other):
+        return self.merge(other)
+
+    def __add__(self, other):
+        return Summary().merge(self).merge(other)
+
+    def __eq__(self, other):
+        return (isinstance(other, Summary) and self.histogram == other.histogram
+                and self.turns == other.turns and self.reasons == other.reasons)
+
+    def __len__(self):
+        return sum(self.histogram)
+
+    count = property(__len__, doc="Number of games.")
+
+    @property
+    def total(self):
+        "Sum of the scores."
+        return sum(score*count for score, count in enumerate(self.histogram))
+
+    @property
+    def mean(self):
+        "Average score (0 without games)."
+        n = self.count
+        return self.total / n if n else 0
+
+    @property
+    def variance(self):
+        "Sample variance of the scores (0 with less than 2 games)."
+        n = self.count
+        if n < 2:
+            return 0
+        squares = sum(score*score*count for score, count in enumerate(self.histogram))
+        total = self.total
+        return (n*squares - total*total) / (n*(n-1))  # exact integers until the division
+
+    @property
+    def stdev(self):
+        return math.sqrt(self.variance)
+
+    @property
+    def min(self):
+        for score, count in enumerate(self.histogram):
+            if count:
+                return score
+        return None
+
+    @property
+    def max(self):
+        for score in range(MAX_SCORE, -1, -1):
+            if self.histogram[score]:
+                return score
+        return None
+
+    @property
+    def perfect(self):
+        "Number of games with 25 points."
+        return self.histogram[MAX_SCORE]
+
+    def percentile(self, p):
+        "The score below or at which p percent of the games are (nearest rank), None without games."
+        n = self.count
+        if not n:
+            return None
+        rank = max(1, math.ceil(p*n / 100))
+        seen = 0
+        for score, count in enumerate(self.histogram):
+            seen += count
+            if seen >= rank:
+                return score
+
+    @property
+    def median(self):
+        return self.percentile(50)
+
+    @property
+    def average_turns(self):
+        "Average number of turns (0 without games)."
+        n = self.count
+        return sum(turns*count for turns, count in self.turns.items()) / n if n else 0
+
+    def to_dict(self):
+        "The summary, as a dict (for json)."
+        return {'games': self.count, 'mean': self.mean, 'stdev': self.stdev,
+                'histogram': list(self.histogram),
+                'turns': {str(turns): count for turns, count in sorted(self.turns.items())},
+                'reasons': dict(self.reasons)}
+
+    def __str__(self):
+        if not self.count:
+            return "No game."
+        lines = ["Games: %d, average score: %.3f (stdev %.3f, min %d, max %d)"%(
+                     self.count, self.mean, self.stdev, self.min, self.max),
+                 "Percentiles: 10%% %d, 50%% %d, 90%% %d"%(
+                     self.percentile(10), self.median, self.percentile(90)),
+                 "Perfect games: %d, average turns: %.1f"%(self.perfect, self.average_turns)]
+        for reason, count in sorted(self.reasons.items()):
+            lines.append("%16s: %d"%(reason, count))
+        return "\n".join(lines)
@@ -0,0 +1,182 @@
+"""
+Tournaments: play many games with an AI, in parallel, without leaving python.
+
+Each game is identified by its seed (see Deck.from_seed), or by its index
+in a deck pool file (see DeckPool). Games are sharded across a pool of
+processes, and only compact results come back to the parent process.
+Replays of lost games (see hanabi.replay) are kept in memory, within the results.
+
+Usage:
+
+    >>> import hanabi.tournament
+    >>> results = list(hanabi.tournament.run('Cheater', players=3, seeds=range(1000)))
+    >>> sum(r.score for r in results) / len(results)
+    >>> print(hanabi.tournament.summarize('Cheater', players=3, seeds=range(10**6)))
+
+summarize() aggregates the results in each worker (see hanabi.stats.Summary):
+only one summary per chunk of games comes back, and memory stays flat.
+With instruments (see hanabi.profiling), it also times the engine and the AI.
+
+or from the command line:
+
+    hanabi --tournament 1000 --ai Cheater -n 3 --jobs 4
+
+.. autosummary::
+   Result
+   play
+   run
+   summarize
+"""
+
+import json
+import multiprocessing
+import random
+from collections import namedtuple
+
+from .deck import Game, DeckPool
+from .replay import Replay, ReplayWriter
+from .events import DECK_EXHAUSTED
+from .stats import Summary
+from . import profiling
+from . import ai
+
+
+Result = namedtuple('Result', 'seed players score turns reason replay')
+Result.__doc__ = """Result of a game.
+
+reason is why the game ended (PERFECT, RED_COINS or DECK_EXHAUSTED),
+replay is the Replay of the game (see hanabi.replay) if it was lost, else None.
+"""
+
+
+
+# deck pools opened by this process
+_pools = {}
+
+
+def play(ai_name, players, seed, keep_lost=True, pool=None, instruments=None):
+    """Play a single game with the given AI class name (see hanabi.ai.by_name) and seed.
+    If pool (a DeckPool filename) is given, the deck is the seed-th one of the pool.
+    instruments (see hanabi.profiling) time the game.
+    """
+    if pool is None:
+        game = Game(players, seed=seed)
+    else:
+        if pool not in _pools:
+            _pools[pool] = DeckPool(pool)
+        game = Game(players, cards=_pools[pool].deck(seed).cards)
+    game.headless = True
+    # the AIs which use random are seeded too: the caller's random state is restored after
+    state = random.getstate()
+    random.seed(seed)
+    try:
+        game.ai = ai.by_name(ai_name)(game)
+        if instruments is not None:
+            instruments.attach(game)
+        game.run()
+    finally:
+        random.setstate(state)
+
+    score = game.score
+    replay = Replay.from_game(game) if keep_lost and score < 25 else None
+    return Result(seed, players, score, game.turns, game.end_reason or DECK_EXHAUSTED, replay)
+
+
+def _play_chunk(args):
+    "Worker: play a list of seeds."
+    ai_name, players, seeds, keep_lost, pool = args
+    return [play(ai_name, players, seed, keep_lost, pool) for seed in seeds]
+
+
+def run(ai_name='Cheater', players=2, seeds=range(100), jobs=None,
+        chunksize=50, keep_lost=True, pool=None):
+    """Play a game for each seed, and yield the results (in completion order).
+
+    jobs is the number of processes (default: number of cores), 1 plays
+    everything in the current process.
+    With a pool (DeckPool filename), seeds are deck indices in this pool:
+    every worker maps the file, no deck is sent to the workers.
+    """
+    seeds = list(seeds)
+    chunks = [(ai_name, players, seeds[i:i+chunksize], keep_lost, pool)
+              for i in range(0, len(seeds), chunksize)]
+    if jobs == 1:
+        for chunk in chunks:
+            yield from _play_chunk(chunk)
+        return
+    with multiprocessing.Pool(jobs) as workers:
+        for results in workers.imap_unordered(_play_chunk, chunks):
+            yield from results
+
+
+def _summarize_chunk(args):
+    "Worker: play a list of seeds, and return their Summary (and Instruments, or None)."
+    ai_name, players, seeds, pool, instrument = args
+    summary = Summary()
+    instruments = profiling.Instruments() if instrument else None
+    for seed in seeds:
+        summary.add_result(play(ai_name, players, seed, False, pool, instruments))
+    return summary, instruments
+
+
+def summarize(ai_name='Cheater', players=2, seeds=range(100), jobs=None,
+              chunksize=1000, pool=None, instruments=None):
+    """Play a game for each seed (seeds is a sequence, such as a range), and return
+    the Summary of the results. Each chunk of seeds is summarized by a worker,
+    see run() for the other arguments.
+    The timings of the games are added to instruments (an Instruments), if given.
+    """
+    # a generator: even the chunks are not kept in memory
+    chunks = ((ai_name, players, seeds[i:i+chunksize], pool, instruments is not None)
+              for i in range(0, len(seeds), chunksize))
+    if jobs == 1:
+        return _merge(map(_summarize_chunk, chunks), instruments)
+    with multiprocessing.Pool(jobs) as workers:
+        return _merge(workers.imap_unordered(_summarize_chunk, chunks), instruments)
+
+
+def _merge(partials, instruments):
+    "Merge the (Summary, Instruments) of the chunks, return the Summary."
+    summary = Summary()
+    for partial, timings in partials:
+        summary.merge(partial)
+        if instruments is not None:
+            instruments.merge(timings)
+    return summary
+
+
+def cli(ai_name, players, games, jobs=None, first_seed=0, save_lost=None, pool=None,
+        instrument=None):
+    """Run a tournament and print a summary.
+
+    If save_lost is given, lost games are appended to this replay file.
+    With instrument, the engine and the AI are timed (see hanabi.profiling): the timings
+    are printed, or written to this file (in json, with the summary) unless it is '-'.
+    """
+    if instrument and save_lost is not None:
+        raise ValueError("Lost games can't be saved while instrumenting.")
+    seeds = range(first_seed, first_seed+games)
+    instruments = profiling.Instruments() if instrument else None
+    if save_lost is None:
+        summary = summarize(ai_name, players, seeds, jobs, pool=pool, instruments=instruments)
+    else:
+        summary = Summary()
+        f = open(save_lost, 'ab')
+        writer = ReplayWriter(f)
+        for result in run(ai_name, players, seeds, jobs, pool=pool):
+            summary.add_result(result)
+            if result.replay is not None:
+                writer.write(result.replay)
+        f.close()
+
+    print("AI %s, %d players, %d games"%(ai_name, players, games))
+    print(summary)
+    if instruments is None:
+        return
+    if instrument == '-':
+        print(instruments)
+    else:
+        f = open(instrument, 'w')
+        json.dump({'ai': ai_name, 'players': players, 'summary': summary.to_dict(),
+                   'instruments': instruments.to_dict()}, f, indent=1)
+        f.close()
@@ -0,0 +1,248 @@
+"""
+What a player may see of a game: a read-only PlayerView.
+
+An AI given the whole Game may read its own cards by accident
+(game.current_hand.cards). A PlayerView only shows what its seat sees:
+the other hands, the piles, the discards, the coins, what the player
+knows of its own cards (their masks, see hanabi.deck.Card) and its legal
+moves.
+
+A view copies nothing (but its history): it is a set of proxies over the
+arrays of the engine, so it is always up to date, and it is built once (see
+hanabi.ai.AI.view). Its seat is the current player's by default.
+
+    >>> view = PlayerView(game)
+    >>> view.hand.str_clue(), view.other_hands[0], view.piles, view.blue_coins
+    >>> view.legal_actions()
+
+PrivilegedView also shows the player's own cards: it is the explicit way
+to cheat (see hanabi.ai.Cheater).
+
+.. autosummary::
+   PlayerView
+   PrivilegedView
+"""
+
+from collections.abc import Sequence
+from types import MappingProxyType
+
+
+class _Rotated(Sequence):
+    "Read-only view of a per-seat list of game, index 0 being the seat of view."
+    __slots__ = ('_view', '_name')
+
+    def __init__(self, view, name):
+        self._view = view
+        self._name = name
+
+    def __len__(self):
+        return len(self._view._game._players)
+
+    def __getitem__(self, i):
+        items = getattr(self._view._game, self._name)
+        n = len(items)
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(n))]
+        if not -n <= i < n:
+            raise IndexError("seat index out of range")
+        return items[(self._view.seat+i)%n]
+
+    def __repr__(self):
+        return repr(self[:])
+
+
+class HandView(Sequence):
+    """Read-only view of the cards of a hand, offset seats after the seat of view.
+    Its cards are those of the game: do not modify them."""
+    __slots__ = ('_view', '_offset')
+
+    def __init__(self, view, offset):
+        self._view = view
+        self._offset = offset
+
+    @property
+    def _cards(self):
+        view = self._view
+        hands = view._game._hands
+        return hands[(view.seat+self._offset)%len(hands)].cards
+
+    def __len__(self):
+        return len(self._cards)
+
+    def __getitem__(self, i):
+        return self._cards[i]
+
+    def __iter__(self):
+        return iter(self._cards)
+
+    def str_clue(self):
+        "What the owner knows of these cards: color and number, * when unknown."
+        return " ".join([c.str_clue() for c in self._cards])
+
+    def __str__(self):
+        return " ".join([c.str_color() for c in self._cards])
+
+    __repr__ = __str__
+
+
+class OwnHand(HandView):
+    """What a player knows of its own hand: hand[i] is the mask of its card i
+    (0-based, see hanabi.deck.Card), never the card."""
+    __slots__ = ()
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [c.mask for c in self._cards[i]]
+        return self._cards[i].mask
+
+    def __iter__(self):
+        return (c.mask for c in self._cards)
+
+    @property
+    def masks(self):
+        "The list of the masks of the hand."
+        return [c.mask for c in self._cards]
+
+    __str__ = __repr__ = HandView.str_clue
+
+
+class DiscardView(HandView):
+    "Read-only view of the discarded and misplayed cards, in discard order."
+    __slots__ = ()
+
+    @property
+    def _cards(self):
+        return self._view._game.discard_pile.cards
+
+
+class PlayerView:
+    """What the player at seat sees of game (the current player if seat is None).
+
+    hand is what it knows of its own cards (see OwnHand), other_hands[i] the
+    hand of the player i+1 seats after it (the target i+1 of a clue), and
+    players their names, from this seat.
+    """
+
+    def __init__(self, game, seat=None):
+        self._game = game
+        self._seat = seat
+        self.hand = OwnHand(self, 0)
+        self.other_hands = tuple(HandView(self, offset) for offset in range(1, len(game._players)))
+        self.players = _Rotated(self, '_players')
+        self.discard_pile = DiscardView(self, 0)
+        self._piles = (game.piles, MappingProxyType(game.piles))
+
+    @property
+    def seat(self):
+        return self._game.seat if self._seat is None else self._seat
+
+    @property
+    def my_turn(self):
+        "Whether it is the turn of this seat."
+        return self._seat is None or self._seat == self._game.seat
+
+    @property
+    def piles(self):
+        "The height of the pile of each color (a read-only mapping)."
+        piles, proxy = self._piles
+        if piles is not self._game.piles:  # the game was reset
+            piles = self._game.piles
+            proxy = MappingProxyType(piles)
+            self._piles = (piles, proxy)
+        return proxy
+
+    @property
+    def discarded(self):
+        "Number of discarded (and misplayed) cards of each kind."
+        return self._game.discarded
+
+    @property
+    def played(self):
+        "1 for each kind on the piles."
+        return self._game.played
+
+    @property
+    def kind_count(self):
+        "Number of cards of each kind in a deck."
+        return self._game.deck.kind_count
+
+    @property
+    def deck_size(self):
+        "Number of cards left in the deck."
+        return len(self._game.deck)
+
+    @property
+    def blue_coins(self):
+        return self._game.blue_coins
+
+    @property
+    def red_coins(self):
+        return self._game.red_coins
+
+    @property
+    def turns(self):
+        return self._game.turns
+
+    @property
+    def score(self):
+        return self._game.score
+
+    @property
+    def over(self):
+        return self._game.over
+
+    @property
+    def deal_token(self):
+        "An opaque object, which is another one once the game is reset (with a new deck)."
+        return self._game.deal_token
+
+    @property
+    def history(self):
+        "The byte codes of the moves (see hanabi.action.encode), a copy."
+        return bytes(self._game.history)
+
+    @property
+    def playable(self):
+        return self._game.playable
+
+    @property
+    def dead(self):
+        return self._game.dead
+
+    @property
+    def critical(self):
+        return self._game.critical
+
+    @property
+    def playable_mask(self):
+        return self._game.playable_mask
+
+    @property
+    def dead_mask(self):
+        return self._game.dead_mask
+
+    @property
+    def critical_mask(self):
+        return self._game.critical_mask
+
+    def legal_mask(self):
+        "The legal moves, as a bitmask of their byte codes (0 if it is not the turn of this seat)."
+        return self._game.legal_mask() if self.my_turn else 0
+
+    def legal_actions(self):
+        "The list of the legal moves (empty if it is not the turn of this seat)."
+        return self._game.legal_actions() if self.my_turn else []
+
+    def log(self, *args, **kwargs):
+        "Print, unless the game is quiet."
+        self._game.log(*args, **kwargs)
+
+
+class PrivilegedView(PlayerView):
+    """A PlayerView which also shows the player's own cards (cards), and
+    the number of cards of each kind in each hand (in_hands, 0 being this seat)."""
+
+    def __init__(self, game, seat=None):
+        super().__init__(game, seat)
+        self.cards = HandView(self, 0)
+        self.in_hands = _Rotated(self, '_in_hands')
@@ -0,0 +1,123 @@
+"""
+Zobrist hashing of game states, and a bounded transposition table.
+
+A state's hash is the xor of one random 64-bit key per component
+(deck position, each hand slot with its card and clue knowledge, piles,
+coins, current seat). An action only changes a few components, so the
+hash is updated by xoring out their old keys and xoring in the new ones:
+Game keeps it up to date in Game.hash.
+
+The keys are drawn from a fixed seed: hashes are the same in every process.
+
+    >>> table = TranspositionTable(2**16)
+    >>> table.store(game.hash, depth, value)
+    >>> table.get(game.hash)   # value, or None
+
+.. autosummary::
+   TranspositionTable
+"""
+
+import random
+
+_rng = random.Random(0x4a4e4142)
+
+
+def _keys(n):
+    return tuple([_rng.getrandbits(64) for _ in range(n)])
+
+
+MAX_PLAYERS = 5
+MAX_HAND = 5
+NKINDS = 25
+
+POSITION = _keys(51)  # cards drawn from the deck, 0 to 50
+SEAT = _keys(MAX_PLAYERS)
+BLUE_COINS = _keys(9)
+RED_COINS = _keys(4)
+# PILES[color*6 + height]
+PILES = _keys(5*6)
+# CARDS[(seat*MAX_HAND + slot)*NKINDS + kind]
+CARDS = _keys(MAX_PLAYERS*MAX_HAND*NKINDS)
+# what the owner knows of the card (its 25-bit mask), 5 bits at a time:
+# MASKS[((seat*MAX_HAND + slot)*5 + i)*32 + (mask >> 5*i & 31)]
+MASKS = _keys(MAX_PLAYERS*MAX_HAND*5*32)
+# hands as multisets of cards (for the solver, where slots don't matter):
+# HAND_COUNTS[(seat*NKINDS + kind)*4 + count]
+HAND_COUNTS = _keys(MAX_PLAYERS*NKINDS*4)
+# turns left once the deck is empty (-1 before)
+LAST_TURNS = _keys(MAX_PLAYERS+2)
+
+
+def card_key(seat, slot, card):
+    "Key of a card (with what its owner knows of it) in a hand slot."
+    i = seat*MAX_HAND + slot
+    key = i << 25 | card.mask
+    mask_key = _mask_keys.get(key)
+    if mask_key is None:
+        mask_key = _mask_keys[key] = _mask_key(i, card.mask)
+    return CARDS[i*NKINDS + card.kind] ^ mask_key
+
+
+def _mask_key(i, mask):
+    base = i*160
+    return (MASKS[base + (mask & 31)] ^ MASKS[base + 32 + (mask >> 5 & 31)]
+            ^ MASKS[base + 64 + (mask >> 10 & 31)] ^ MASKS[base + 96 + (mask >> 15 & 31)]
+            ^ MASKS[base + 128 + (mask >> 20 & 31)])
+
+
+# clues give masks of a set of colors times a set of numbers: at most 1024 per slot
+_mask_keys = {}
+
+
+def hand_key(seat, slot, cards):
+    "Xor of the keys of cards[slot:] (slot is 0-based)."
+    key = 0
+    for i in range(slot, len(cards)):
+        key ^= card_key(seat, i, cards[i])
+    return key
+
+
+class TranspositionTable:
+    """A fixed size hash table of search results, indexed by Zobrist hashes.
+
+    Each hash goes to one slot (its low bits). When two states share a slot,
+    the one searched the deepest is kept: it saved the most work.
+    The full hash is stored too, so that get() never returns another state's value.
+    """
+
+    def __init__(self, size=2**20):
+        "size is rounded up to a power of 2."
+        self.size = 1
+        while self.size < size:
+            self.size *= 2
+        self._mask = self.size - 1
+        self.clear()
+
+    def clear(self):
+        self._entries = [None]*self.size
+        self.stored = 0
+        self.hits = self.misses = 0
+
+    def __len__(self):
+        return self.stored
+
+    def get(self, key):
+        "The value stored for this hash, or None."
+        entry = self._entries[key & self._mask]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry[2]
+        self.misses += 1
+        return None
+
+    def store(self, key, depth, value):
+        """Store the value of a state searched to the given depth (or with this
+        many turns ahead). Return whether it was stored."""
+        i = key & self._mask
+        entry = self._entries[i]
+        if entry is None:
+            self.stored += 1
+        elif entry[0] != key and entry[1] > depth:
+            return False
+        self._entries[i] = (key, depth, value)
+        return True
@@ -12,6 +12,7 @@ setup(
     version = "0.1.0",
     packages = find_packages("."),
     scripts=['hanabi/hanabi'],
+    extras_require = {'batch': ['numpy'], 'belief': ['numpy']},
     author = "JD. Garaud",
     author_email = "jdgaraud@onera.fr",
     description = "Hanabi game: CLI, GUI and AI",
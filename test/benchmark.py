@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Benchmarks of the engine and AI hot paths, compared with a baseline of this machine.
+
+    python3 benchmark.py            # measure, and compare with benchmark_baseline.json
+    python3 benchmark.py --save     # measure, and store the results as the new baseline
+
+A measure is a regression if it is worse than the baseline by more than
+the tolerance (20% by default), or above its budget (see BUDGETS): the
+exit status is then 1. Timings are the best of a few repeats, to filter
+out the noise of the machine.
+Baselines depend on the machine, so none is committed: a measure which
+has no baseline yet is stored as its baseline (benchmark_baseline.json is
+ignored by git).
+
+For reference, the engine rewrite (headless games, integer card kinds,
+index-based deck and hands, per-kind counters) made full headless Cheater
+games 2 to 3 times faster, from 4 players up the most: 210-230 games/s
+before it, 420-650 after, on the same machine.
+"""
+
+import argparse
+import glob
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import hanabi
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE = os.path.join(HERE, 'benchmark_baseline.json')
+
+
+def best_time(function, repeat=3):
+    "The best time of repeat calls of function, in seconds."
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def cheater_game(players, seed):
+    random.seed(seed)
+    game = hanabi.Game(players, seed=seed)
+    game.headless = True
+    game.ai = hanabi.ai.Cheater(game)
+    game.run()
+    return game
+
+
+def quiet_turns(games=100):
+    "Engine only: turns per second, replaying the moves of Cheater games on quiet Games."
+    histories = [(seed, bytes(cheater_game(3, seed).history)) for seed in range(games)]
+    turns = sum(len(history) for _, history in histories)
+
+    def replay():
+        for seed, history in histories:
+            game = hanabi.Game(3, seed=seed)
+            game.quiet = True
+            for code in history:
+                try:
+                    game.apply_code(code)
+                except StopIteration:
+                    break
+    return turns / best_time(replay)
+
+
+def cheater_games(players, games=100):
+    "Full Cheater games per second."
+    return games / best_time(lambda: [cheater_game(players, seed) for seed in range(games)])
+
+
+def cheater_latency(games=50):
+    "Average time of a Cheater.play() decision, in microseconds."
+    times = []
+
+    def timed(play):
+        def play_and_time():
+            start = time.perf_counter()
+            action = play()
+            times.append(time.perf_counter() - start)
+            return action
+        return play_and_time
+
+    def run():
+        del times[:]
+        for seed in range(games):
+            random.seed(seed)
+            game = hanabi.Game(3, seed=seed)
+            game.headless = True
+            game.ai = hanabi.ai.Cheater(game)
+            game.ai.play = timed(game.ai.play)
+            game.run()
+        return sum(times) / len(times)
+    return min(run() for _ in range(3)) * 1e6
+
+
+def load_replays():
+    "Time of Game.load() on all the test/game*.py replays, in milliseconds."
+    files = sorted(glob.glob(os.path.join(HERE, 'game*.py')))
+
+    def load():
+        for filename in files:
+            game = hanabi.Game(2)
+            game.quiet = True
+            try:
+                game.load(filename)
+            except StopIteration:
+                pass
+    return best_time(load) * 1000
+
+
+def shuffle_deal(decks=2000):
+    "Time to shuffle a deck and deal 3 hands, in microseconds."
+    def deal():
+        for _ in range(decks):
+            deck = hanabi.deck.Deck()
+            deck.shuffle()
+            deck.deal(3)
+    return best_time(deal) / decks * 1e6
+
+
+def game_memory(games=200):
+    "Memory of a live game (3 players, a few moves played), in kilobytes."
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = []
+    for seed in range(games):
+        game = hanabi.Game(3, seed=seed)
+        game.quiet = True
+        for action in game.legal_actions()[:1]:
+            game.step(action)
+        kept.append(game)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used / games / 1024
+
+
+def import_time(module='hanabi.deck', repeat=5):
+    "Time to import module (and what it needs) in a new interpreter, in milliseconds."
+    code = ("import time; start = time.perf_counter(); import %s; "
+            "print(time.perf_counter() - start)"%module)
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    best = float('inf')
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', code], env=env, check=True,
+                             stdout=subprocess.PIPE, universal_newlines=True).stdout
+        best = min(best, float(out))
+    return best * 1000
+
+
+# name: (function, unit, higher is better)
+BENCHMARKS = {
+    'quiet_turns_per_s': (quiet_turns, 'turns/s', True),
+    'cheater_games_per_s_2p': (lambda: cheater_games(2), 'games/s', True),
+    'cheater_games_per_s_3p': (lambda: cheater_games(3), 'games/s', True),
+    'cheater_games_per_s_4p': (lambda: cheater_games(4), 'games/s', True),
+    'cheater_games_per_s_5p': (lambda: cheater_games(5), 'games/s', True),
+    'cheater_play_latency': (cheater_latency, 'us', False),
+    'load_test_replays': (load_replays, 'ms', False),
+    'shuffle_deal': (shuffle_deal, 'us', False),
+    'memory_per_game': (game_memory, 'kB', False),
+    'import_hanabi': (lambda: import_time('hanabi'), 'ms', False),
+    'import_engine': (lambda: import_time('hanabi.deck'), 'ms', False),
+}
+
+# absolute limits, whatever the baseline: batch workers and the hanabi
+# script must start in a few tens of milliseconds
+BUDGETS = {
+    'import_hanabi': 10,
+    'import_engine': 80,
+}
+
+
+def measure(names=None):
+    "Run the benchmarks, return {name: value}."
+    return {name: BENCHMARKS[name][0]() for name in (names or BENCHMARKS)}
+
+
+def compare(results, baseline, tolerance):
+    "Print the results next to the baseline. Return the names of the regressions."
+    regressions = []
+    for name, value in results.items():
+        unit, higher_is_better = BENCHMARKS[name][1:]
+        reference = baseline.get(name)
+        budget = BUDGETS.get(name)
+        if budget is not None and value > budget:
+            status = 'OVER BUDGET (%g %s)'%(budget, unit)
+            regressions.append(name)
+        elif reference is None:
+            status = 'no baseline'
+        else:
+            ratio = value / reference if reference else float('inf')
+            worse = ratio < 1-tolerance if higher_is_better else ratio > 1+tolerance
+            status = '%+6.1f%% %s'%(100*(ratio-1), 'REGRESSION' if worse else 'ok')
+            if worse:
+                regressions.append(name)
+        print("%-24s %12.2f %-8s %s"%(name, value, unit, status))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks of the hanabi engine and AIs.')
+    parser.add_argument('names', nargs='*', help='benchmarks to run (default: all)')
+    parser.add_argument('--save', action='store_true', help='store the results as the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='relative slowdown flagged as a regression (default 0.2)')
+    parser.add_argument('--baseline', default=BASELINE, help='baseline file')
+    args = parser.parse_args(argv)
+
+    results = measure(args.names)
+    baseline = {}
+    if os.path.exists(args.baseline):
+        f = open(args.baseline)
+        baseline = json.load(f)
+        f.close()
+    regressions = compare(results, baseline, args.tolerance)
+    missing = {name: value for name, value in results.items() if name not in baseline}
+    if args.save or missing:
+        if not args.save:
+            print("no baseline on this machine for %s: saved to %s"
+                  %(', '.join(sorted(missing)), args.baseline))
+        baseline.update(results if args.save else missing)
+        f = open(args.baseline, 'w')
+        json.dump(baseline, f, indent=1, sort_keys=True)
+        f.close()
+    if args.save:
+        return 0
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,6 +1,13 @@
+import random
+import time
 import unittest
 import hanabi
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 
 
 class ColorTest(unittest.TestCase):
@@ -26,6 +33,15 @@ class CardTest(unittest.TestCase):
         string_card = "R4"
         self.assertEqual(c1, string_card)
 
+    def test_kind(self):
+        c1 = hanabi.deck.Card(hanabi.deck.Color.Blue, 4)
+        c2 = hanabi.deck.Card('B', 4)
+        self.assertEqual(c1.kind, c2.kind)
+        self.assertEqual(hash(c1), hash(c2))
+        self.assertEqual(hanabi.deck.CARD_NAMES[c1.kind], "B4")
+        self.assertEqual([c1, c2, "B4"].count(c1), 3)
+        self.assertEqual(len(set(hanabi.deck.Deck().cards)), 25)
+
     def test_number(self):
         #self.assertRaises(hanabi.deck.Card('R', 7),  AssertionError)
         with self.assertRaises(AssertionError):
@@ -73,14 +89,48 @@ class DeckTest(unittest.TestCase):
 
 
     def test_draw(self):
-        pass
+        deck = hanabi.deck.Deck()
+        first = deck.cards[0]
+        self.assertEqual(deck.draw(), first)
+        self.assertEqual(len(deck), 49)
+        self.assertEqual(len(deck.cards), 49)
+        for i in range(49):
+            deck.draw()
+        self.assertRaises(IndexError, deck.draw)
 
     def test_deal(self):
-        pass
+        deck = hanabi.deck.Deck()
+        hands = deck.deal(3)
+        self.assertEqual([len(h) for h in hands], [5, 5, 5])
+        self.assertEqual(len(deck), 35)
 
 
 class DeckTest2(unittest.TestCase):
-    pass
+    def test_seed(self):
+        deck = hanabi.deck.Deck.from_seed(42)
+        self.assertEqual(str(deck), str(hanabi.deck.Deck.from_seed(42)))
+        self.assertNotEqual(str(deck), str(hanabi.deck.Deck.from_seed(43)))
+        self.assertEqual(hanabi.Game(2, seed=42).deck.to_bytes(), deck.to_bytes())
+
+    def test_bytes(self):
+        deck = hanabi.deck.Deck.from_seed(1)
+        data = deck.to_bytes()
+        self.assertEqual(len(data), 50)
+        self.assertEqual(repr(hanabi.deck.Deck.from_bytes(data)), repr(deck))
+
+    def test_pool(self):
+        import os, tempfile
+        fd, filename = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            hanabi.deck.DeckPool.create(filename, 10, first_seed=5)
+            pool = hanabi.deck.DeckPool(filename)
+            self.assertEqual(len(pool), 10)
+            self.assertEqual(bytes(pool[2]), hanabi.deck.Deck.from_seed(7).to_bytes())
+            self.assertEqual(len(pool.view(8)), 100)
+            self.assertRaises(IndexError, pool.__getitem__, 10)
+        finally:
+            os.remove(filename)
 
 
 
@@ -124,6 +174,245 @@ class GameTest(unittest.TestCase):
 
     # lines 397, 431
 
+    def test_seats(self):
+        game = hanabi.Game(3)
+        game.quiet = True
+        hands = list(game.hands)
+        game.turn('c%dB'%hands[1].cards[0].number)
+        self.assertEqual(game.players[:], ['Benji', 'Clara', 'Alice'])
+        self.assertIs(game.current_hand, hands[1])
+        self.assertIs(game.hands[-1], hands[0])
+        self.assertEqual(game.hands[1:], hands[2:] + hands[:1])
+
+    def test_counts(self):
+        game = hanabi.Game(3)
+        game.headless = True
+        game.ai = hanabi.ai.Cheater(game)
+        for i in range(30):
+            game.turn(game.ai)
+            for card in hanabi.deck.Deck().cards[::2]:
+                k = card.kind
+                self.assertEqual(game.discarded[k], game.discard_pile.cards.count(card))
+                self.assertEqual(game.in_deck[k], game.deck.cards.count(card))
+                self.assertEqual(game.in_hands[1][k], game.hands[1].cards.count(card))
+                self.assertEqual(game.played[k], int(card.number <= game.piles[card.color]))
+                self.assertEqual(k in game.playable, card.number == game.piles[card.color]+1)
+                self.assertEqual(k in game.dead, card.number <= game.piles[card.color])
+
+    def test_critical(self):
+        game = hanabi.Game(2)
+        r5 = hanabi.deck.Card(hanabi.deck.Color.Red, 5).kind
+        r4 = hanabi.deck.Card(hanabi.deck.Color.Red, 4).kind
+        self.assertIn(r5, game.critical)
+        self.assertNotIn(r4, game.critical)
+        game._discarded[r4] = 1
+        game._update_color(0)
+        self.assertIn(r4, game.critical)
+        game._discarded[r4] = 2
+        game._update_color(0)
+        self.assertIn(r5, game.dead)
+
+    def test_undo(self):
+        import random
+        from hanabi.action import Play, Discard, Clue
+        rng = random.Random(3)
+        game = hanabi.Game(3, seed=3)
+        game.headless = True
+        tokens, states = [], []
+        while len(tokens) < 40:
+            states.append(game.snapshot())
+            action = rng.choice([Play(rng.randint(1, 4)), Discard(rng.randint(1, 4)),
+                                 Clue(rng.choice('RBGWY12345'), rng.randint(1, 2))])
+            try:
+                tokens.append(game.apply(action))
+            except ValueError:
+                states.pop()
+            except StopIteration as e:
+                tokens.append(e.undo_token)
+                break
+        for token, state in reversed(list(zip(tokens, states))):
+            game.undo(token)
+            self.assertEqual(game.snapshot(), state)
+
+    def test_bad_clue_target(self):
+        from hanabi.action import Clue
+        game = hanabi.Game(3, seed=1)
+        game.headless = True
+        state, h = game.snapshot(), game.hash
+        masks = [[card.mask for card in hand.cards] for hand in game._hands]
+        for target in (-1, -2, 0, 3):
+            self.assertRaises((ValueError, IndexError), game.apply, Clue('1', target))
+        self.assertEqual(game.snapshot(), state)
+        self.assertEqual((game.blue_coins, game.hash, bytes(game.history)), (8, h, b''))
+        self.assertEqual([[card.mask for card in hand.cards] for hand in game._hands], masks)
+
+    def test_snapshot(self):
+        game = hanabi.Game(4, seed=8)
+        game.headless = True
+        game.ai = hanabi.ai.Cheater(game)
+        state = game.snapshot()
+        game.run()
+        game.restore(state)
+        self.assertEqual(game.snapshot(), state)
+        self.assertEqual(len(game.deck), 34)
+        self.assertTrue(all(c.mask == hanabi.deck.ALL_KINDS for c in game.deck.cards))
+
+    def test_hash(self):
+        from hanabi.action import Play, Discard, Clue
+        game = hanabi.Game(3, seed=5)
+        game.headless = True
+        start = game.hash
+        tokens = []
+        card = game.hands[2].cards[0]
+        color, number = str(card)
+        for action in (Clue(number, 2), Play(1), Discard(2), Clue(color, 2)):
+            tokens.append(game.apply(action))
+            self.assertEqual(game.hash, game.compute_hash())
+        self.assertNotEqual(game.hash, start)
+        for token in reversed(tokens):
+            game.undo(token)
+        self.assertEqual(game.hash, start)
+        # the same clues, in another order, give the same state
+        game.apply(Clue(number, 2))
+        game.apply(Clue(color, 1))
+        other = hanabi.Game(3, seed=5)
+        other.apply(Clue(color, 2))
+        other.apply(Clue(number, 1))
+        self.assertEqual(game.hash, other.hash)
+        self.assertEqual(game.hash, other.compute_hash())
+
+    def test_knowledge(self):
+        from hanabi.deck import ALL_KINDS, COLOR_MASKS, NUMBER_MASKS
+        game = hanabi.Game(2, seed=1)
+        cards = game.hands[1].cards
+        number = cards[0].number
+        token = game.apply(hanabi.action.Clue(str(number)))
+        for card in cards:
+            if card.number == number:
+                self.assertEqual(card.mask, NUMBER_MASKS[number-1])
+            else:  # negative information
+                self.assertEqual(card.mask, ALL_KINDS & ~NUMBER_MASKS[number-1])
+        self.assertEqual(cards[0].str_clue(), '*%d'%number)
+        game.apply(hanabi.action.Clue(str(game.hands[1].cards[0].number)))  # Benji clues Alice
+        game.apply(hanabi.action.Clue(str(cards[0].color)[0]))
+        self.assertEqual(cards[0].mask, NUMBER_MASKS[number-1] & COLOR_MASKS[cards[0].kind//5])
+        self.assertEqual(cards[0].str_clue(), str(cards[0]))
+        self.assertEqual(game.hands[0].masks, [card.mask for card in cards])
+        ai = hanabi.ai.AI(game)
+        self.assertEqual(ai.surely_playable(cards[0]), number == 1)
+        self.assertEqual(game.playable_mask, NUMBER_MASKS[0])
+        game.undo(game.apply(hanabi.action.Discard(1)))
+        game.restore(game.snapshot())
+        self.assertEqual(cards[0].mask, NUMBER_MASKS[number-1] & COLOR_MASKS[cards[0].kind//5])
+
+    def test_state_bytes(self):
+        from hanabi.deck import STATE_LAYOUT
+        for players in range(2, 6):
+            game = hanabi.Game(players, seed=players)
+            game.headless = True
+            ai = hanabi.ai.Cheater(game)
+            for turns in range(0, 70, 7):
+                data = game.to_bytes()
+                self.assertEqual(len(data), STATE_LAYOUT.size)
+                copy = hanabi.Game.from_bytes(data)
+                self.assertEqual(copy.to_bytes(), data)
+                self.assertEqual(copy.hash, game.hash)
+                for name in ('piles', 'hands', 'discarded', 'played', 'in_deck',
+                             'in_hands', 'sets', 'blue_coins', 'red_coins', 'end_turn'):
+                    self.assertEqual(getattr(copy.snapshot(), name),
+                                     getattr(game.snapshot(), name))
+                self.assertEqual(sorted(copy.discard_pile.cards, key=str),
+                                 sorted(game.discard_pile.cards, key=str))
+                self.assertEqual(copy.legal_mask(), game.legal_mask())
+                for _ in range(7):
+                    if not game.over:
+                        game.turn(ai)
+        self.assertRaises(ValueError, hanabi.Game.from_bytes, b'\x02' + data[1:])
+
+    def test_reset_knowledge(self):
+        from hanabi.deck import ALL_KINDS
+        game = hanabi.Game(2, seed=1)
+        game.apply(hanabi.action.Clue(str(game.hands[1].cards[0].number)))
+        other = hanabi.Game(2, cards=game.starting_deck.cards)  # the same Card objects
+        self.assertEqual(other.hash, hanabi.Game(2, seed=1).hash)
+        self.assertTrue(all(card.mask == ALL_KINDS for hand in other.hands for card in hand.cards))
+        game.reset(2, cards=other.starting_deck.cards)
+        self.assertEqual(game.hash, game.compute_hash())
+
+    def test_transposition_table(self):
+        from hanabi.zobrist import TranspositionTable
+        table = TranspositionTable(1000)
+        self.assertEqual(table.size, 1024)
+        self.assertTrue(table.store(5, 3, 'a'))
+        self.assertEqual(table.get(5), 'a')
+        self.assertIsNone(table.get(5+1024))
+        self.assertFalse(table.store(5+1024, 2, 'b'))  # shallower: rejected
+        self.assertTrue(table.store(5+1024, 3, 'b'))
+        self.assertIsNone(table.get(5))
+        self.assertEqual(table.get(5+1024), 'b')
+        self.assertEqual(len(table), 1)
+
+    def test_structured_actions(self):
+        game = hanabi.Game(2)
+        game.headless = True
+        self.assertTrue(game.quiet)
+        game.turn([hanabi.action.Discard(1),  # invalid with 8 blue coins
+                   hanabi.action.Play(3)])
+        self.assertEqual(len(game.deck.cards), 39)
+        self.assertEqual([str(m) for m in game.moves], ['d1', 'p3'])
+        game.turn(hanabi.action.Clue(str(game.hands[1].cards[0].number)))
+        self.assertEqual(game.blue_coins, 7)
+        game.turn(hanabi.action.Discard(2))
+        self.assertEqual(game.blue_coins, 8)
+
+    def test_legal_actions(self):
+        rng = random.Random(3)
+        game = hanabi.Game(3, seed=3)
+        game.headless = True
+        while not game.over:
+            mask = game.legal_mask()
+            self.assertEqual(mask >> 30, 0)  # no clue to a 4th or 5th player
+            for code in range(30):
+                action = hanabi.action.decode(code)
+                try:
+                    game.undo(game.apply(action))
+                    valid = True
+                except ValueError:
+                    valid = False
+                except StopIteration as e:
+                    game.undo(e.undo_token)
+                    valid = True
+                self.assertEqual(bool(mask >> code & 1), valid, code)
+                self.assertEqual(game.is_legal(action), valid, code)
+            legal = game.legal_actions()
+            self.assertEqual(len(legal), bin(mask).count('1'))
+            self.assertEqual(game.step(rng.choice(legal)),
+                             hanabi.action.GAME_OVER if game.over else hanabi.action.VALID)
+        self.assertEqual(game.legal_actions(), [])
+
+    def test_step(self):
+        game = hanabi.Game(2, seed=1)
+        game.headless = True
+        state = game.snapshot()
+        self.assertEqual(game.step(hanabi.action.Discard(1)), hanabi.action.INVALID)
+        self.assertEqual(game.step(hanabi.action.Play(6)), hanabi.action.INVALID)
+        self.assertEqual(game.step(hanabi.action.Clue('R', 2)), hanabi.action.INVALID)
+        self.assertEqual(game.snapshot(), state)
+        for i in range(2, 6):
+            game = hanabi.Game(i, seed=i)
+            game.headless = True
+            game.ai = hanabi.ai.Cheater(game)
+            game.run()
+            self.assertTrue(game.over)
+
+    def test_headless_run(self):
+        for i in range(2, 6):
+            game = hanabi.Game(i)
+            game.headless = True
+            game.ai = hanabi.ai.Cheater(game)
+            game.run()
+            self.assertTrue(0 <= game.score <= 25)
+
     def test_nb_players(self):
         for i in range (2,6):
             game = hanabi.Game(i)
@@ -136,5 +425,615 @@ class GameTest(unittest.TestCase):
 
 
 
+class ReplayTest(unittest.TestCase):
+    def test_codes(self):
+        from hanabi.action import Play, Discard, Clue, encode, decode
+        for action in (Play(1), Play(5), Discard(3), Clue('R'), Clue('5', 4)):
+            self.assertEqual(decode(encode(action)), action)
+        self.assertEqual(len(set(encode(Clue(h, t)) for h in 'RBGWY12345' for t in range(1, 5))), 40)
+
+    def test_stream(self):
+        import io
+        import hanabi.replay
+        f = io.BytesIO()
+        writer = hanabi.replay.ReplayWriter(f)
+        games = []
+        for seed, cards in ((1, None), (None, hanabi.deck.Deck.from_seed(2).cards),
+                            (-3, None), (2**70, None)):
+            game = hanabi.Game(3, cards=cards, seed=seed)
+            game.headless = True
+            game.ai = hanabi.ai.Cheater(game)
+            game.run()
+            games.append(game)
+            writer.write(hanabi.replay.Replay.from_game(game))
+        f.seek(0)
+        replays = list(hanabi.replay.ReplayReader(f))
+        self.assertEqual(len(replays), 4)
+        self.assertEqual([r.seed for r in replays], [1, None, None, None])
+        for game, replay in zip(games, replays):
+            self.assertEqual(replay.ai, 'Cheater')
+            self.assertEqual(replay.game().score, game.score)
+            self.assertEqual(replay.game().history, game.history)
+
+    def test_legacy(self):
+        import os
+        import hanabi.replay
+        here = os.path.dirname(os.path.abspath(__file__))
+        for name, score in (('game7.py', 23), ('game9.py', 0)):
+            replay = hanabi.replay.convert_legacy(os.path.join(here, name))
+            self.assertEqual(replay.score, score)
+            self.assertEqual(replay.game().score, score)
+
+
+class NavigatorTest(unittest.TestCase):
+    def test_seek(self):
+        import hanabi.replay
+        game = hanabi.Game(3, seed=5)
+        game.headless = True
+        game.ai = hanabi.ai.Cheater(game)
+        game.run()
+        replay = hanabi.replay.Replay.from_game(game)
+        nav = hanabi.replay.Navigator(replay, interval=5)
+        self.assertEqual(len(nav), len(replay.moves))
+        self.assertEqual(nav.seek(len(nav)).score, game.score)
+        for position in (17, 3, 0, 40):
+            state = nav.seek(position)
+            self.assertEqual(state.history, replay.game(position).history)
+        self.assertEqual(nav.forward().history, replay.game(41).history)
+        self.assertEqual(nav.back().history, replay.game(40).history)
+        self.assertEqual(nav.back().deck.position, replay.game(39).deck.position)
+
+
+class TournamentTest(unittest.TestCase):
+    def test_reproducible(self):
+        import hanabi.tournament
+        results = sorted(hanabi.tournament.run('Cheater', 3, range(6), jobs=2, chunksize=2))
+        self.assertEqual([r.seed for r in results], list(range(6)))
+        self.assertEqual(results, list(hanabi.tournament.run('Cheater', 3, range(6), jobs=1)))
+        for r in results:
+            self.assertEqual(r.replay is None, r.score == 25)
+
+    def test_random_state(self):
+        import hanabi.tournament
+        random.seed(5)
+        expected = random.random()
+        random.seed(5)
+        hanabi.tournament.play('Cheater', 2, 3)
+        self.assertEqual(random.random(), expected)
+
+
+class SummaryTest(unittest.TestCase):
+    def test_statistics(self):
+        import statistics
+        from hanabi.stats import Summary
+        rng = random.Random(1)
+        scores = [rng.randint(0, 25) for _ in range(501)]
+        summary = Summary()
+        for score in scores:
+            summary.add(score, 2*score, 'perfect' if score == 25 else 'other')
+        self.assertEqual(summary.count, 501)
+        self.assertAlmostEqual(summary.mean, statistics.mean(scores))
+        self.assertAlmostEqual(summary.variance, statistics.variance(scores))
+        self.assertEqual((summary.min, summary.max), (min(scores), max(scores)))
+        self.assertEqual(summary.median, statistics.median(scores))
+        self.assertEqual(summary.percentile(100), max(scores))
+        self.assertEqual(summary.perfect, scores.count(25))
+        self.assertEqual(summary.reasons['perfect'], scores.count(25))
+        self.assertAlmostEqual(summary.average_turns, 2*summary.mean)
+        self.assertIsNone(Summary().percentile(50))
+
+    def test_merge(self):
+        import pickle
+        import hanabi.tournament
+        from hanabi.stats import Summary
+        whole = Summary()
+        for result in hanabi.tournament.run('Cheater', 2, range(12), jobs=1):
+            whole.add_result(result)
+        parts = hanabi.tournament.summarize('Cheater', 2, range(12), jobs=2, chunksize=5)
+        self.assertEqual(parts, whole)
+        self.assertEqual(pickle.loads(pickle.dumps(whole)) + Summary(), whole)
+
+
+class EvaluateTest(unittest.TestCase):
+    def test_estimate(self):
+        import hanabi.evaluate
+        result = hanabi.evaluate.estimate('Cheater', 2, precision=0.5, batch=20, jobs=1)
+        self.assertEqual(result.games, 40)  # at least 2 batches
+        self.assertLessEqual(result.half_width, 0.5)
+        self.assertEqual(result.mean, result.summary.mean)
+        result = hanabi.evaluate.estimate('Cheater', 2, precision=0, batch=20, max_games=50, jobs=1)
+        self.assertEqual(result.games, 50)
+
+    def test_compare(self):
+        import hanabi.evaluate as evaluate
+        result = evaluate.compare('Cheater', 'Cheater', 2, batch=20, jobs=1)
+        self.assertEqual((result.verdict, result.games), (evaluate.EQUIVALENT, 20))
+
+        def scores(ai_name, players, seeds, jobs, pool):
+            offset = 2 if ai_name == 'A' else 0
+            return {s: 20 + offset + s % 3 for s in seeds}
+        saved = evaluate._scores
+        evaluate._scores = scores
+        try:
+            self.assertEqual(evaluate.compare('A', 'B', batch=10).verdict, evaluate.BETTER)
+            self.assertEqual(evaluate.compare('B', 'A', batch=10).verdict, evaluate.WORSE)
+        finally:
+            evaluate._scores = saved
+
+
+class ProfilingTest(unittest.TestCase):
+    def test_instruments(self):
+        import hanabi.profiling
+        instruments = hanabi.profiling.Instruments()
+        game = hanabi.Game(3, seed=5)
+        game.headless = True
+        instruments.attach(game)
+        game.ai = hanabi.ai.Cheater(game)  # the AI may be set after attach()
+        game.run()
+        timers = instruments.timers
+        moves = sum(timers[name].count for name in ('play', 'discard', 'clue'))
+        self.assertEqual(moves, len(game.history))
+        self.assertEqual(timers['turn'].count, len(game.history))
+        self.assertGreaterEqual(timers['ai'].count, len(game.history))
+        self.assertEqual(sum(timers['ai'].histogram.values()), timers['ai'].count)
+        instruments.detach(game)
+        self.assertNotIn('turn', vars(game))
+        self.assertNotIn('play', vars(game.ai))
+
+    def test_tournament(self):
+        import hanabi.profiling
+        import hanabi.tournament
+        instruments = hanabi.profiling.Instruments()
+        summary = hanabi.tournament.summarize('Cheater', 2, range(6), jobs=2, chunksize=3,
+                                              instruments=instruments)
+        self.assertEqual(summary, hanabi.tournament.summarize('Cheater', 2, range(6), jobs=1))
+        self.assertEqual(instruments.timers['turn'].count, summary.count*summary.average_turns)
+        self.assertIn('ai', instruments.to_dict())
+
+
+class EventsTest(unittest.TestCase):
+    class Recorder(hanabi.events.Observer):
+        def __init__(self):
+            self.events = []
+
+        def notify(self, event):
+            self.events.append(event)
+
+    def test_stream(self):
+        game = hanabi.Game(3, seed=4)
+        game.headless = True
+        self.assertEqual(game.observers, [])
+        recorder = self.Recorder()
+        game.subscribe(recorder)
+        game.ai = hanabi.ai.Cheater(game)
+        game.run()
+        events = recorder.events
+        self.assertEqual(events[0], hanabi.events.GameStart(
+            ['Alice', 'Benji', 'Clara'], 4, game.deck.to_bytes(), 'Cheater'))
+        self.assertEqual(events[-1], hanabi.events.GameEnd(game.score, game.turns, game.end_reason))
+        moves = [e for e in events if hasattr(e, 'code')]
+        self.assertEqual(bytes(e.code for e in moves), bytes(game.history))
+        draws = [e for e in events if e.kind == 'draw']
+        self.assertEqual(len(draws), 35 - len(game.deck))
+        self.assertEqual(draws[-1].deck_size, len(game.deck))
+
+    def test_stats_and_replays(self):
+        import io
+        import hanabi.replay
+        stats = hanabi.events.StatsCollector()
+        f = io.BytesIO()
+        writer = hanabi.replay.ReplayWriter(f)
+        for seed in range(4):
+            game = hanabi.Game(2, seed=seed)
+            game.headless = True
+            game.ai = hanabi.ai.Cheater(game)
+            game.subscribe(stats)
+            game.subscribe(hanabi.replay.ReplayRecorder(game, writer))
+            game.run()
+        self.assertEqual(stats.summary.count, 4)
+        self.assertEqual(sum(stats.summary.reasons.values()), 4)
+        f.seek(0)
+        replays = list(hanabi.replay.ReplayReader(f))
+        self.assertEqual(sum(r.score for r in replays), stats.summary.total)
+        self.assertEqual(sum(stats.moves.values()), sum(len(r.moves) for r in replays))
+
+    def test_quiet(self):
+        game = hanabi.Game(2)
+        self.assertEqual(len(game.observers), 1)  # the text output
+        game.quiet = True
+        self.assertEqual(game.observers, [])
+
+
+class SolverTest(unittest.TestCase):
+    def test_solution(self):
+        import hanabi.solver
+        for players in range(2, 6):
+            for seed in range(3):
+                solution = hanabi.solver.solve(hanabi.deck.Deck.from_seed(seed), players)
+                self.assertTrue(solution.exact)
+                game = hanabi.Game(players, seed=seed)
+                game.headless = True
+                for action in solution.moves:
+                    game.apply(action)
+                self.assertEqual(game.score, solution.score)
+                cheater = hanabi.Game(players, seed=seed)
+                cheater.headless = True
+                cheater.ai = hanabi.ai.Cheater(cheater)
+                cheater.run()
+                self.assertGreaterEqual(solution.score, cheater.score)
+
+    def test_limit(self):
+        import hanabi.solver
+        solution = hanabi.solver.solve(hanabi.deck.Deck.from_seed(8), 5, node_limit=1000)
+        self.assertFalse(solution.exact)
+        game = hanabi.Game(5, seed=8)
+        game.headless = True
+        for action in solution.moves:
+            game.apply(action)
+        self.assertEqual(game.score, solution.score)
+
+    def test_hard_decks(self):
+        # the slowest decks of seeds 0-11 (but 5 players), proven in a few seconds
+        import hanabi.solver
+        for players, seed in ((2, 6), (3, 8), (4, 8)):
+            solution = hanabi.solver.solve(hanabi.deck.Deck.from_seed(seed), players,
+                                           node_limit=10**6)
+            self.assertTrue(solution.exact)
+            self.assertEqual(solution.score, 25)
+            game = hanabi.Game(players, seed=seed)
+            game.headless = True
+            for action in solution.moves:
+                game.apply(action)
+            self.assertEqual(game.score, 25)
+
+
+class MCTSTest(unittest.TestCase):
+    def test_observation(self):
+        import hanabi.mcts
+        game = hanabi.Game(3, seed=4)
+        game.turn(hanabi.action.Clue(str(game.hands[2].cards[1].number), 2))
+        game.turn(hanabi.action.Discard(1))
+        # Clara's turn: she knows the number of one card, nothing else about her hand
+        obs = hanabi.mcts.observe(hanabi.view.PlayerView(game))
+        self.assertEqual(obs.hands[2], [None]*5)
+        number = game.hands[0].cards[1].number
+        self.assertEqual(obs.masks[2][1], hanabi.deck.NUMBER_MASKS[number-1])
+        self.assertEqual(sum(obs.unseen), 50 - 10 - 1)
+        rng = random.Random(0)
+        for _ in range(20):
+            sim = hanabi.mcts.determinize(obs, rng)
+            self.assertEqual(sim.hands[2][1] % 5 + 1, number)
+            self.assertEqual(len(sim.deck), len(game.deck))
+
+    def test_play(self):
+        game = hanabi.Game(2, seed=3)
+        game.headless = True
+        game.ai = hanabi.ai.MCTS(game, budget=None, iterations=30, seed=1)
+        game.turn(game.ai)
+        self.assertEqual(game.ai.iterations, 30)
+        game.turn(game.ai)
+        tree, history, deal = game.ai._trees[0]
+        self.assertEqual(history, b'')
+        game.turn(game.ai)  # Alice goes on with the subtree of the moves played since
+        self.assertGreater(game.ai._trees[0][0].visits, 30)
+        game.run()
+        self.assertGreater(game.score, 0)
+
+    def test_undone_tree(self):
+        game = hanabi.Game(2, seed=3)
+        game.headless = True
+        ai = hanabi.ai.MCTS(game, budget=None, iterations=30, seed=1)
+        first = ai.play()
+        tokens = [game.apply(first)]
+        tokens.append(game.apply(ai.play()))
+        for token in reversed(tokens):
+            game.undo(token)
+        game.apply([action for action in game.legal_actions() if action != first][0])
+        ai.play()  # Benji's tree was searched after another move: not reused
+        self.assertEqual(ai._trees[1][0].visits, 30)
+        game.reset(2, seed=3)
+        game.apply(first)
+        ai.play()  # the same moves, in a new game
+        self.assertEqual(ai._trees[1][0].visits, 30)
+
+    def test_budget(self):
+        game = hanabi.Game(3, seed=3)
+        game.headless = True
+        game.ai = hanabi.ai.MCTS(game, budget=20)
+        start = time.perf_counter()
+        game.turn(game.ai)
+        self.assertLess(time.perf_counter() - start, 1)
+        self.assertGreater(game.ai.iterations, 0)
+
+    def test_executor_deadline(self):
+        import concurrent.futures
+        game = hanabi.Game(3, seed=3)
+        game.headless = True
+        with concurrent.futures.ThreadPoolExecutor(1) as executor:
+            # 10 jobs for 1 worker: the waiting ones stop at the deadline of the move
+            game.ai = hanabi.ai.MCTS(game, budget=100, executor=executor, jobs=10)
+            start = time.perf_counter()
+            game.turn(game.ai)
+            self.assertLess(time.perf_counter() - start, 0.6)
+        self.assertGreater(game.ai.iterations, 0)
+
+    def test_no_limit(self):
+        game = hanabi.Game(2, seed=3)
+        with self.assertRaises(ValueError):
+            hanabi.ai.MCTS(game, budget=None, iterations=None)
+
+
+@unittest.skipIf(numpy is None, "requires numpy")
+class BatchTest(unittest.TestCase):
+    def test_same_scores_as_cheater(self):
+        import hanabi.batch
+        for n in range(2, 6):
+            decks = []
+            for i in range(20):
+                deck = hanabi.deck.Deck()
+                deck.shuffle()
+                decks.append(deck)
+            batch = hanabi.batch.BatchGame(decks, n)
+            scores = batch.run(hanabi.batch.BatchCheater())
+            for deck, score in zip(decks, scores):
+                game = hanabi.Game(n)
+                game.reset(n, cards=deck.cards)
+                game.headless = True
+                game.ai = hanabi.ai.Cheater(game)
+                game.run()
+                self.assertEqual(game.score, score)
+
+    def test_random(self):
+        import hanabi.batch
+        batch = hanabi.batch.BatchGame.random(50, 3, random.Random(1))
+        self.assertEqual(batch.decks.shape, (50, 50))
+        scores = batch.run(hanabi.batch.BatchCheater())
+        self.assertEqual(len(scores), 50)
+        self.assertTrue(((scores >= 0) & (scores <= 25)).all())
+
+    def test_pool(self):
+        import os, tempfile
+        import hanabi.batch
+        fd, filename = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            hanabi.deck.DeckPool.create(filename, 10)
+            pool = hanabi.deck.DeckPool(filename)
+            batch = hanabi.batch.BatchGame.from_pool(pool, 3, 2, 6)
+            self.assertFalse(batch.decks.flags.owndata)  # read without copy
+            self.assertEqual(bytes(batch.decks[1]), hanabi.deck.Deck.from_seed(3).to_bytes())
+            scores = batch.run(hanabi.batch.BatchCheater())
+        finally:
+            os.remove(filename)
+        self.assertEqual(len(scores), 4)
+
+
+
+@unittest.skipIf(numpy is None, "requires numpy")
+class BeliefTest(unittest.TestCase):
+    def test_unseen(self):
+        import hanabi.belief
+        game = hanabi.Game(3, seed=7)
+        game.headless = True
+        game.ai = hanabi.ai.Cheater(game)
+        beliefs = [hanabi.belief.Belief(game, seat) for seat in range(3)]
+        for _ in range(40):
+            game.turn(game.ai)
+            for belief in beliefs:
+                unseen = numpy.array(game.deck.kind_count) - game.discarded - numpy.array(game.played)
+                for seat, hand in enumerate(game._hands):
+                    if seat != belief.seat:
+                        for card in hand.cards:
+                            unseen[card.kind] -= 1
+                distribution = belief.distribution()
+                self.assertEqual(list(belief.unseen), list(unseen))
+                self.assertTrue(numpy.allclose(distribution.sum(axis=1), 1))
+
+    def test_probabilities(self):
+        import hanabi.belief
+        game = hanabi.Game(2, seed=2)
+        belief = hanabi.belief.Belief(game, seat=1)
+        unseen = belief.unseen
+        self.assertEqual(unseen.sum(), 45)  # Alice's cards are seen
+        ones = sum(unseen[kind] for kind in game.playable)
+        self.assertTrue(numpy.allclose(belief.p_playable(), ones/45))
+        game.apply(hanabi.action.Clue('1'))
+        ones = [card.number == 1 for card in game.hands[0].cards]
+        p = belief.p_playable()
+        for one, p_one in zip(ones, p):
+            self.assertEqual(p_one == 1, one)
+        self.assertTrue(numpy.allclose(belief.p_safe_discard(), 1 - belief.p_critical()))
+
+    def test_undo(self):
+        import hanabi.belief
+        game = hanabi.Game(2, seed=2)
+        game.headless = True
+        belief = hanabi.belief.Belief(game, seat=1)
+        game.apply(hanabi.action.Play(1))  # Alice plays: Benji sees her new card
+        token = game.apply(hanabi.action.Play(2))  # Benji reveals his card 2
+        belief.p_playable()
+        game.undo(token)
+        game.apply(hanabi.action.Play(3))  # as many moves as before, another card
+        fresh = hanabi.belief.Belief(game, seat=1)
+        self.assertTrue(numpy.allclose(belief.distribution(), fresh.distribution()))
+        self.assertEqual(list(belief.unseen), list(fresh.unseen))
+        game.reset(2, seed=3)
+        game.apply(hanabi.action.Play(1))
+        game.apply(hanabi.action.Play(3))  # the same history, another deck
+        fresh = hanabi.belief.Belief(game, seat=1)
+        self.assertTrue(numpy.allclose(belief.distribution(), fresh.distribution()))
+        self.assertEqual(list(belief.unseen), list(fresh.unseen))
+
+
+class ViewTest(unittest.TestCase):
+    def test_player_view(self):
+        from hanabi.view import PlayerView
+        game = hanabi.Game(3, seed=4)
+        game.headless = True
+        view = PlayerView(game)  # of the current player
+        benji = PlayerView(game, seat=1)
+        cheater = hanabi.ai.Cheater(game)
+        for _ in range(20):
+            self.assertEqual(view.seat, game.seat)
+            self.assertEqual(list(view.hand), game.current_hand.masks)
+            self.assertFalse(hasattr(view, 'cards'))
+            for hand, seen in zip(game.hands[1:], view.other_hands):
+                self.assertEqual(list(seen), hand.cards)
+            self.assertEqual(list(view.players), list(game.players))
+            self.assertEqual(dict(view.piles), game.piles)
+            self.assertEqual(list(view.discard_pile), game.discard_pile.cards)
+            self.assertEqual((view.blue_coins, view.red_coins, view.deck_size),
+                             (game.blue_coins, game.red_coins, len(game.deck)))
+            self.assertEqual(view.legal_actions(), game.legal_actions())
+            self.assertEqual(bool(benji.legal_mask()), game.seat == 1)
+            self.assertEqual(list(benji.hand), game._hands[1].masks)
+            self.assertEqual(list(benji.other_hands[0]), game._hands[2].cards)
+            game.turn(cheater)
+        with self.assertRaises(TypeError):
+            view.piles[hanabi.deck.Color.Red] = 5
+        game.reset(3, seed=5)  # the same view follows the new game
+        self.assertEqual(dict(view.piles), game.piles)
+        self.assertEqual(list(view.hand), game.current_hand.masks)
+
+    def test_privileged_view(self):
+        game = hanabi.Game(2, seed=3)
+        cheater = hanabi.ai.Cheater(game)
+        self.assertIsInstance(cheater.view, hanabi.view.PrivilegedView)
+        self.assertEqual(list(cheater.view.cards), game.current_hand.cards)
+        self.assertEqual(list(cheater.view.in_hands[1]), list(game.in_hands[1]))
+        self.assertFalse(hasattr(hanabi.ai.AI(game).view, 'cards'))
+        self.assertIs(cheater.game, game)
+        self.assertFalse(hasattr(hanabi.ai.AI(game), 'game'))
+        self.assertFalse(hasattr(hanabi.ai.MCTS(game), 'game'))
+
+
+class ServerTest(unittest.TestCase):
+    "Games on localhost."
+
+    def run_server(self, test):
+        import asyncio
+        from hanabi.server import Server
+
+        async def main():
+            server = Server()
+            async with await server.start('127.0.0.1', 0):
+                await asyncio.wait_for(test(server), 60)
+        asyncio.run(main())
+
+    async def connect(self, server):
+        import asyncio
+        reader, writer = await asyncio.open_connection('127.0.0.1', server.port)
+
+        def send(line):
+            writer.write(line.encode() + b'\n')
+
+        async def until(*words):
+            "The lines received, until one starting with one of words."
+            lines = []
+            while not lines or lines[-1].split()[0] not in words:
+                line = await reader.readline()
+                self.assertTrue(line, "connection closed, waiting for %s"%(words,))
+                lines.append(line.decode().strip())
+            return lines
+        return send, until, writer
+
+    def test_humans(self):
+        async def test(server):
+            send_a, until_a, writer_a = await self.connect(server)
+            send_b, until_b, writer_b = await self.connect(server)
+            send_a('new 2 5')
+            self.assertEqual(await until_a('table'), ['table 1'])
+            send_a('join 1')
+            self.assertEqual(await until_a('seat'), ['seat 0 Alice'])
+            send_a('p1')
+            self.assertEqual(await until_a('error'), ['error not your turn'])
+            send_b('join 1')
+            self.assertEqual(await until_b('seat'), ['seat 1 Benji'])
+            game = server.tables[1].game
+            lines = await until_a('your')
+            self.assertIn('start Alice Benji', lines)
+            self.assertIn('hand ** ** ** ** **', lines)
+            self.assertIn('sees Benji ' + ' '.join(['%s:**'%card for card in game._hands[1].cards]),
+                          lines)
+            self.assertIn('moves ' + ' '.join(map(str, game.legal_actions())), lines)
+            card = game._hands[0].cards[0]
+            send_a('p1')
+            lines_a, lines_b = await until_a('turn'), await until_b('your')
+            new = game._hands[0].cards[-1]
+            self.assertIn('draw Alice', lines_a)
+            self.assertIn('draw Alice %s'%new, lines_b)
+            self.assertFalse(any(str(new) in line for line in lines_a if line.startswith('draw')))
+            self.assertTrue(any(line.endswith('Alice 1 %s'%card) for line in lines_b))
+            self.assertNotIn('sees Benji', ' '.join(lines_b))
+            send_b('p9')
+            self.assertEqual(await until_b('error'), ['error invalid move p9'])
+            moves = [line for line in lines_b if line.startswith('moves')][-1].split()
+            clue = [move for move in moves if move.startswith('c')][0]
+            send_b(clue)
+            self.assertEqual((await until_a('clue'))[-1].split()[:4],
+                             ['clue', 'Benji', 'Alice', clue[1]])
+            await until_a('your')
+            writer_b.close()
+            self.assertEqual((await until_a('end'))[-1].split()[-1], 'interrupted')
+            self.assertEqual(server.tables, {})
+            writer_a.close()
+        self.run_server(test)
+
+    def test_bots(self):
+        async def test(server):
+            send, until, writer = await self.connect(server)
+            send('new 2')
+            await until('table')
+            for name in ('AI', 'PlayerView', 'collections.OrderedDict', 'hanabi.ai.Cheater'):
+                send('bot 1 ' + name)
+                self.assertEqual(await until('error'), ['error %s is not a known AI.'%name])
+            self.assertEqual(server.tables[1].free, 2)
+            send('bot 1 Cheater')
+            self.assertEqual(await until('seat'), ['seat 0 Alice'])
+            writer.close()
+        self.run_server(test)
+
+    def test_tables(self):
+        async def human(server):
+            send, until, writer = await self.connect(server)
+            send('new 2')
+            number = (await until('table'))[-1].split()[1]
+            send('join ' + number)
+            send('bot %s Cheater'%number)
+            lines = await until('your', 'end')
+            while lines[-1].startswith('your'):
+                moves = [line for line in lines if line.startswith('moves')][-1].split()[1:]
+                send(moves[-1])  # a clue if possible, else a discard
+                lines = await until('your', 'end')
+            writer.close()
+            return lines[-1]
+
+        async def test(server):
+            import asyncio
+            ends = await asyncio.gather(*[human(server) for _ in range(100)])
+            self.assertEqual(len(ends), 100)
+            self.assertFalse([end for end in ends if end.endswith('interrupted')])
+            self.assertEqual(server.tables, {})
+        self.run_server(test)
+
+
+class ImportTest(unittest.TestCase):
+    def test_lazy(self):
+        import os, subprocess, sys
+        code = ("import sys, hanabi; hanabi.Game; "
+                "print(' '.join(m for m in ('hanabi.ai', 'readline', 'hanabi.ascii_art') if m in sys.modules))")
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+        out = subprocess.run([sys.executable, '-c', code], env=env, check=True,
+                             stdout=subprocess.PIPE, universal_newlines=True).stdout
+        self.assertEqual(out.split(), [])
+        self.assertIs(hanabi.ai.by_name('Cheater'), hanabi.ai.Cheater)
+        self.assertRaises(ValueError, hanabi.ai.by_name, 'Nobody')
+        self.assertRaises(ValueError, hanabi.ai.by_name, 'nowhere.Nobody')
+        for name in ('AI', 'PlayerView', 'Play', 'collections.OrderedDict'):
+            self.assertRaises(ValueError, hanabi.ai.by_name, name)
+        self.assertIs(hanabi.ai.by_name('hanabi.ai.Cheater'), hanabi.ai.Cheater)
+        self.assertRaises(ValueError, hanabi.ai.by_name, 'hanabi.ai.Cheater', imports=False)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -11,11 +11,5 @@ if [ -z "$nb_players" ]; then
     nb_players=2
 fi
 
-for i in $(seq 1 $nb); do
-    score=$(hanabi -n $nb_players --ai=Cheater |grep score |sed -e 's/.*is //')
-    echo $score
-    if [ $score -lt 25 ]; then
-        cp autosave.py gamelost$i.py
-    fi
-done
+hanabi --tournament $nb -n $nb_players --ai=Cheater --save-lost gameslost.hnb
 